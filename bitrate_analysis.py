@@ -0,0 +1,184 @@
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+import database
+from quality import QUALITY_TIERS, QUALITY_TIER_NAMES, parse_resolution
+
+# Files without a stored video bit rate get an ESTIMATE from the whole file (size over duration).
+# It includes the audio tracks, so it is only used here and never written back to video_bitrate.
+LOAD_COLUMNS = ["id", "video_codec", "resolution", "frame_rate",
+                "COALESCE(video_bitrate, CASE WHEN duration > 0 THEN file_size * 8.0 / duration END)"]
+
+# A file is flagged when it is in the bottom OUTLIER_PERCENTILE of its (codec, tier) group
+# AND below OUTLIER_MEDIAN_RATIO of the group median, so healthy groups don't always yield 5% flags.
+OUTLIER_PERCENTILE = 5
+OUTLIER_MEDIAN_RATIO = 0.5
+MIN_GROUP_SIZE = 20
+SUMMARY_PERCENTILES = (5, 50, 95)
+
+
+def parse_frame_rate(frame_rate):
+    """Parses ffprobe's "24000/1001" or Plex's "23.976" into frames per second, or NaN."""
+    if not frame_rate:
+        return np.nan
+    numerator, sep, denominator = frame_rate.partition("/")
+    try:
+        fps = float(numerator) / float(denominator) if sep else float(numerator)
+    except (ValueError, ZeroDivisionError):
+        return np.nan
+    return fps if fps > 0 else np.nan
+
+
+def _encode(values, codes):
+    """Maps strings to small integer codes, growing `codes` ({value: code}) as new values appear."""
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values))
+
+
+def load_bitrate_data(top_folder=None, chunk_size=50000):
+    """Loads the columns needed for bitrate analysis into NumPy arrays.
+
+    Strings are encoded once per distinct value (there are only a few hundred resolutions and
+    frame rates in a library), then expanded with array indexing instead of per-row parsing.
+    """
+    codec_codes, resolution_codes, rate_codes = {}, {}, {}
+    ids, codecs, resolutions, rates, bitrates = [], [], [], [], []
+
+    for rows in database.iter_file_records(LOAD_COLUMNS, top_folder=top_folder,
+                                           file_types=database.VIDEO_FILE_TYPES, chunk_size=chunk_size):
+        chunk_ids, chunk_codecs, chunk_resolutions, chunk_rates, chunk_bitrates = zip(*rows)
+        ids.append(np.array(chunk_ids, dtype=np.int64))
+        codecs.append(_encode(chunk_codecs, codec_codes))
+        resolutions.append(_encode(chunk_resolutions, resolution_codes))
+        rates.append(_encode(chunk_rates, rate_codes))
+        bitrates.append(np.array([b if b else np.nan for b in chunk_bitrates], dtype=np.float64))
+
+    if not ids:
+        return None
+
+    sizes = [parse_resolution(r) for r in resolution_codes]
+    width_lut = np.array([w if w else np.nan for w, _ in sizes], dtype=np.float64)
+    height_lut = np.array([h if h else np.nan for _, h in sizes], dtype=np.float64)
+    fps_lut = np.array([parse_frame_rate(r) for r in rate_codes], dtype=np.float64)
+    resolution_index = np.concatenate(resolutions)
+
+    return {
+        "id": np.concatenate(ids),
+        "codec": np.concatenate(codecs),
+        "codec_names": list(codec_codes),
+        "width": width_lut[resolution_index],
+        "height": height_lut[resolution_index],
+        "fps": fps_lut[np.concatenate(rates)],
+        "bitrate": np.concatenate(bitrates),
+    }
+
+
+def tier_index(width, height):
+    """Vectorised quality.resolution_tier(): index into QUALITY_TIERS, or -1 if the size is unknown."""
+    known = ~(np.isnan(width) | np.isnan(height))
+    conditions = [known & ((width >= w) | (height >= h)) for _, w, h in QUALITY_TIERS]
+    return np.select(conditions, np.arange(len(QUALITY_TIERS)), default=-1)
+
+
+def compute_efficiency(data, percentile=OUTLIER_PERCENTILE, median_ratio=OUTLIER_MEDIAN_RATIO,
+                       min_group_size=MIN_GROUP_SIZE):
+    """Computes bits per pixel per frame, its percentile within each (codec, tier) group, and outlier flags.
+
+    Returns (results, groups). `results` holds arrays for the rows that could be scored;
+    `groups` is a list of per-group summaries.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bpp = data["bitrate"] / (data["width"] * data["height"] * data["fps"])
+    tiers = tier_index(data["width"], data["height"])
+    valid = np.isfinite(bpp) & (bpp > 0) & (tiers >= 0)
+
+    ids = data["id"][valid]
+    bpp = bpp[valid]
+    if not len(ids):
+        return {"id": ids, "bits_per_pixel": bpp, "percentile": bpp.copy(), "outlier": np.zeros(0, dtype=bool)}, []
+    group = data["codec"][valid].astype(np.int64) * len(QUALITY_TIERS) + tiers[valid]
+
+    # ✅ Sort once by (group, bpp); every group is then a contiguous, ordered run
+    order = np.lexsort((bpp, group))
+    sorted_group = group[order]
+    sorted_bpp = bpp[order]
+    starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_group)])
+    run = np.repeat(np.arange(len(starts)), counts)
+
+    rank = np.arange(len(sorted_bpp)) - starts[run]
+    sorted_pct = np.where(counts[run] > 1, rank / np.maximum(counts[run] - 1, 1) * 100, 50.0)
+    medians = sorted_bpp[starts + (counts - 1) // 2]
+    sorted_outlier = ((sorted_pct < percentile)
+                      & (sorted_bpp < medians[run] * median_ratio)
+                      & (counts[run] >= min_group_size))
+
+    pct = np.empty_like(sorted_pct)
+    pct[order] = sorted_pct
+    outlier = np.empty_like(sorted_outlier)
+    outlier[order] = sorted_outlier
+
+    groups = []
+    group_keys = sorted_group[starts]
+    group_outliers = np.add.reduceat(sorted_outlier.astype(np.int64), starts)
+    for i, key in enumerate(group_keys):
+        quantiles = {q: float(sorted_bpp[starts[i] + int(q / 100 * (counts[i] - 1))]) for q in SUMMARY_PERCENTILES}
+        groups.append({
+            "codec": data["codec_names"][key // len(QUALITY_TIERS)],
+            "tier": QUALITY_TIER_NAMES[key % len(QUALITY_TIERS)],
+            "count": int(counts[i]),
+            "percentiles": quantiles,
+            "outliers": int(group_outliers[i]),
+        })
+
+    return {"id": ids, "bits_per_pixel": bpp, "percentile": pct, "outlier": outlier}, groups
+
+
+def run_bitrate_analysis(top_folder=None, percentile=OUTLIER_PERCENTILE, median_ratio=OUTLIER_MEDIAN_RATIO,
+                         min_group_size=MIN_GROUP_SIZE, write=True):
+    """Loads, analyses and (optionally) stores bitrate efficiency for all probed videos. Returns the group summaries."""
+    started = time.perf_counter()
+    data = load_bitrate_data(top_folder)
+    if data is None:
+        logging.info("No video files to analyse.")
+        return []
+    loaded = time.perf_counter()
+
+    results, groups = compute_efficiency(data, percentile, median_ratio, min_group_size)
+    computed = time.perf_counter()
+    logging.info(f"📊 Bitrate analysis: {len(data['id'])} rows loaded in {loaded - started:.2f}s, "
+                 f"{len(results['id'])} scored in {computed - loaded:.3f}s, {int(results['outlier'].sum())} outliers.")
+
+    if write:
+        database.store_bitrate_efficiency(
+            zip(results["bits_per_pixel"].round(5).tolist(), results["percentile"].round(1).tolist(),
+                results["outlier"].astype(int).tolist(), results["id"].tolist()),
+            top_folder=top_folder,
+        )
+    return groups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag encodes with abnormally low bitrate for their codec and resolution.")
+    parser.add_argument("--top-folder", help="Only analyse files from this scan target")
+    parser.add_argument("--percentile", type=float, default=OUTLIER_PERCENTILE, help="Flag files below this percentile of their group")
+    parser.add_argument("--median-ratio", type=float, default=OUTLIER_MEDIAN_RATIO, help="Also require being below this fraction of the group median")
+    parser.add_argument("--min-group", type=int, default=MIN_GROUP_SIZE, help="Don't flag files in smaller groups")
+    parser.add_argument("--dry-run", action="store_true", help="Print the summary without storing flags")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    groups = run_bitrate_analysis(args.top_folder, args.percentile, args.median_ratio, args.min_group, write=not args.dry_run)
+
+    print(f"{'codec':<12} {'tier':<6} {'files':>8} {'p5 bpp':>9} {'p50 bpp':>9} {'p95 bpp':>9} {'flagged':>8}")
+    for g in sorted(groups, key=lambda g: -g["count"]):
+        p = g["percentiles"]
+        print(f"{g['codec'] or '?':<12} {g['tier']:<6} {g['count']:>8} {p[5]:>9.4f} {p[50]:>9.4f} {p[95]:>9.4f} {g['outliers']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import logging
+from database.db_connection import get_connection
+from database.file_records import VIDEO_FILE_TYPES
+from database.directories import join_file_path
+
+ANALYSIS_FIELDS = [
+    "analysis_crop", "analysis_blockiness", "analysis_upscale_psnr",
+    "analysis_luma_low", "analysis_luma_high", "analysis_frames",
+]
+
+# Identifies one version of a file; a changed size or mtime invalidates its cached analysis
+FILE_IDENTITY_SQL = "file_size || ':' || file_modified"
+
+
+def get_files_needing_analysis(after_id=0, limit=500, top_folder=None):
+    """Returns probed videos without an analysis for their current identity, in id order after `after_id`.
+
+    Rows are (id, file_path, resolution, duration, video_bitrate, identity).
+    """
+    folder_filter = "AND top_folder = ?" if top_folder is not None else ""
+    params = [*VIDEO_FILE_TYPES, after_id]
+    if top_folder is not None:
+        params.append(top_folder)
+    params.append(limit)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    # ✅ FileRecords directly so the id range is walked in rowid order; paths are rebuilt for the page only
+    cursor.execute(f"""
+        SELECT id, dir_id, file_name, resolution, duration, video_bitrate, {FILE_IDENTITY_SQL}
+        FROM FileRecords
+        WHERE file_type IN ({', '.join('?' for _ in VIDEO_FILE_TYPES)})
+        AND detailed_scan_attempted = 1 AND resolution IS NOT NULL AND duration > 0
+        AND (analysis_key IS NULL OR analysis_key != {FILE_IDENTITY_SQL})
+        AND id > ? {folder_filter}
+        ORDER BY id
+        LIMIT ?
+    """, params)
+    rows = [(file_id, join_file_path(cursor, dir_id, file_name), *rest)
+            for file_id, dir_id, file_name, *rest in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def store_analysis_results(results):
+    """Stores deep-analysis metrics in bulk. `results` is a list of (id, identity, metrics) tuples.
+
+    Failed analyses are stored with empty metrics so they aren't retried until the file changes.
+    """
+    if not results:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(f"""
+        UPDATE FileRecords
+        SET {', '.join(f'{field} = ?' for field in ANALYSIS_FIELDS)}, analysis_key = ?
+        WHERE id = ?
+    """, [(*((metrics or {}).get(field) for field in ANALYSIS_FIELDS), identity, file_id)
+          for file_id, identity, metrics in results])
+    conn.commit()
+    conn.close()
+    logging.info(f"Stored deep analysis results for {len(results)} files.")
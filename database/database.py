@@ -1,18 +1,43 @@
 # database/database.py
-from database.db_connection import get_connection, enable_wal_mode
-from database.schema import initialize_database, validate_database
+from database.db_connection import get_connection, enable_wal_mode, configure_logging
+from database.schema import initialize_database, validate_database, ensure_database
 from database.scan_targets import (
     get_all_unique_top_folders, get_selected_top_folders, add_scan_target,
-    activate_scan_target, deactivate_scan_target, update_last_scanned, delete_scan_target
+    activate_scan_target, deactivate_scan_target, update_last_scanned, delete_scan_target,
+    get_target_schedule, set_target_schedule, get_filter_fingerprint, set_filter_fingerprint
+)
+from database.directory_state import get_directory_states, save_directory_states, delete_directory_states
+from database.file_records import (
+    store_scan_results, get_total_file_count, get_unscanned_videos, update_video_metadata, mark_file_as_scanned,
+    get_file_record_columns, iter_file_records, VIDEO_FILE_TYPES,
+    get_videos_missing_title_key, set_title_keys, clear_title_keys, iter_duplicate_candidates, import_video_metadata, METADATA_FIELDS,
+    store_bitrate_efficiency, store_scan_batch
+)
+from database.directories import get_directory_id, get_directory_path, file_key, ROOT_DIRECTORY_ID
+from database.maintenance import (
+    get_database_stats, format_database_stats, analyze_database, incremental_vacuum, checkpoint_wal,
+    vacuum_database, set_journal_mode, run_maintenance, ANALYZE_CHANGE_THRESHOLD
+)
+from database.streams import (
+    get_file_streams, get_files_with_stream, get_files_missing_language, requeue_files_without_streams, STREAM_FIELDS
+)
+from database.analysis_results import get_files_needing_analysis, store_analysis_results, ANALYSIS_FIELDS
+from database.work_queue import (
+    make_worker_id, count_pending_videos, claim_videos, heartbeat, complete_claim, release_claims,
+    reclaim_expired_leases, DEFAULT_LEASE_SECONDS
+)
+from database.settings import (
+    get_selected_smb_server, set_selected_smb_server, get_scan_filters, set_scan_filters,
+    get_scan_schedule, set_scan_schedule, get_title_key_version, set_title_key_version
 )
-from database.file_records import store_scan_results, get_total_file_count, get_unscanned_videos, update_video_metadata, mark_file_as_scanned
-from database.settings import get_selected_smb_server, set_selected_smb_server
 
 # ✅ Explicitly assign functions to module-level attributes
 get_connection = get_connection
 enable_wal_mode = enable_wal_mode
+configure_logging = configure_logging
 initialize_database = initialize_database
 validate_database = validate_database
+ensure_database = ensure_database
 get_all_unique_top_folders = get_all_unique_top_folders
 get_selected_top_folders = get_selected_top_folders
 add_scan_target = add_scan_target
@@ -20,6 +45,12 @@ store_scan_results = store_scan_results
 get_total_file_count = get_total_file_count
 get_selected_smb_server = get_selected_smb_server
 set_selected_smb_server = set_selected_smb_server
+get_scan_filters = get_scan_filters
+set_scan_filters = set_scan_filters
+get_scan_schedule = get_scan_schedule
+set_scan_schedule = set_scan_schedule
+get_title_key_version = get_title_key_version
+set_title_key_version = set_title_key_version
 get_all_unique_top_folders = get_all_unique_top_folders
 activate_scan_target = activate_scan_target
 deactivate_scan_target = deactivate_scan_target
@@ -27,18 +58,80 @@ add_scan_target = add_scan_target
 get_unscanned_videos = get_unscanned_videos
 update_video_metadata = update_video_metadata
 mark_file_as_scanned = mark_file_as_scanned
+get_file_record_columns = get_file_record_columns
+iter_file_records = iter_file_records
+VIDEO_FILE_TYPES = VIDEO_FILE_TYPES
+get_videos_missing_title_key = get_videos_missing_title_key
+set_title_keys = set_title_keys
+clear_title_keys = clear_title_keys
+iter_duplicate_candidates = iter_duplicate_candidates
+import_video_metadata = import_video_metadata
+METADATA_FIELDS = METADATA_FIELDS
+store_bitrate_efficiency = store_bitrate_efficiency
+store_scan_batch = store_scan_batch
+get_directory_id = get_directory_id
+get_directory_path = get_directory_path
+file_key = file_key
+ROOT_DIRECTORY_ID = ROOT_DIRECTORY_ID
+make_worker_id = make_worker_id
+count_pending_videos = count_pending_videos
+claim_videos = claim_videos
+heartbeat = heartbeat
+complete_claim = complete_claim
+release_claims = release_claims
+reclaim_expired_leases = reclaim_expired_leases
+DEFAULT_LEASE_SECONDS = DEFAULT_LEASE_SECONDS
+get_target_schedule = get_target_schedule
+set_target_schedule = set_target_schedule
+get_filter_fingerprint = get_filter_fingerprint
+set_filter_fingerprint = set_filter_fingerprint
+get_directory_states = get_directory_states
+save_directory_states = save_directory_states
+delete_directory_states = delete_directory_states
+get_files_needing_analysis = get_files_needing_analysis
+store_analysis_results = store_analysis_results
+ANALYSIS_FIELDS = ANALYSIS_FIELDS
+get_file_streams = get_file_streams
+get_files_with_stream = get_files_with_stream
+get_files_missing_language = get_files_missing_language
+requeue_files_without_streams = requeue_files_without_streams
+STREAM_FIELDS = STREAM_FIELDS
+get_database_stats = get_database_stats
+format_database_stats = format_database_stats
+analyze_database = analyze_database
+incremental_vacuum = incremental_vacuum
+checkpoint_wal = checkpoint_wal
+vacuum_database = vacuum_database
+set_journal_mode = set_journal_mode
+run_maintenance = run_maintenance
+ANALYZE_CHANGE_THRESHOLD = ANALYZE_CHANGE_THRESHOLD
 
 
 # ✅ Ensure all functions are explicitly exposed for wildcard imports
 __all__ = [
-    "get_connection", "enable_wal_mode",
-    "initialize_database", "validate_database",
+    "get_connection", "enable_wal_mode", "configure_logging",
+    "initialize_database", "validate_database", "ensure_database",
     "get_all_unique_top_folders", "get_selected_top_folders", "add_scan_target",
     "store_scan_results", "get_total_file_count",
     "get_selected_smb_server", "set_selected_smb_server",
+    "get_scan_filters", "set_scan_filters", "get_scan_schedule", "set_scan_schedule",
+     "get_title_key_version", "set_title_key_version",
     "activate_scan_target", "deactivate_scan_target",
      "update_last_scanned", "delete_scan_target",
      "get_unscanned_videos", "update_video_metadata",
-     "mark_file_as_scanned"
+     "mark_file_as_scanned",
+     "get_file_record_columns", "iter_file_records", "VIDEO_FILE_TYPES",
+     "get_videos_missing_title_key", "set_title_keys", "clear_title_keys", "iter_duplicate_candidates",
+     "import_video_metadata", "METADATA_FIELDS", "store_bitrate_efficiency", "store_scan_batch",
+     "get_directory_id", "get_directory_path", "file_key", "ROOT_DIRECTORY_ID",
+     "make_worker_id", "count_pending_videos", "claim_videos", "heartbeat", "complete_claim",
+     "release_claims", "reclaim_expired_leases", "DEFAULT_LEASE_SECONDS",
+     "get_target_schedule", "set_target_schedule", "get_filter_fingerprint", "set_filter_fingerprint",
+     "get_directory_states", "save_directory_states", "delete_directory_states",
+     "get_files_needing_analysis", "store_analysis_results", "ANALYSIS_FIELDS",
+     "get_file_streams", "get_files_with_stream", "get_files_missing_language",
+     "requeue_files_without_streams", "STREAM_FIELDS",
+     "get_database_stats", "format_database_stats", "analyze_database", "incremental_vacuum", "checkpoint_wal",
+     "vacuum_database", "set_journal_mode", "run_maintenance", "ANALYZE_CHANGE_THRESHOLD"
 
 ]
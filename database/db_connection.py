@@ -2,18 +2,36 @@ import sqlite3
 import os
 import logging
 
-# Configure logging
-logging.basicConfig(
-    filename="plex_quality_crawler.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-
 DB_FILE = "plex_quality_crawler.db"
+LOG_FILE = "plex_quality_crawler.log"
+
+# Page cache per connection scales with the database: an eighth of the file, between SQLite's 2 MB default and 64 MB
+MIN_CACHE_KIB = 2048
+MAX_CACHE_KIB = 65536
+
+def configure_logging(level=logging.INFO):
+    """Sends log output to the application log file. Called by entry points, never at import time."""
+    logging.basicConfig(
+        filename=LOG_FILE,
+        level=level,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+def _cache_size_kib():
+    try:
+        size = os.path.getsize(DB_FILE)
+    except OSError:
+        return MIN_CACHE_KIB
+    return max(MIN_CACHE_KIB, min(MAX_CACHE_KIB, size // 8 // 1024))
 
 def get_connection():
-    """Returns a database connection."""
-    return sqlite3.connect(DB_FILE)
+    """Returns a database connection with the per-connection pragmas applied."""
+    conn = sqlite3.connect(DB_FILE)
+    # ✅ NORMAL avoids an fsync per commit but is only durable in WAL mode; other journal modes keep FULL
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{_cache_size_kib()}")
+    return conn
 
 def enable_wal_mode():
     """Enable Write-Ahead Logging (WAL) mode for better performance."""
@@ -0,0 +1,101 @@
+import os
+import threading
+
+# Directories form a tree of (id, parent_id, name) rows. The root "/" is row 1 with an empty name,
+# so a file path is stored once per directory instead of once per file (and once more in its index).
+ROOT_DIRECTORY_ID = 1
+
+# Rebuilds every directory's path; used by the FileRecordPaths compatibility view.
+DIRECTORY_PATHS_CTE = """
+    WITH RECURSIVE DirectoryPaths(id, path) AS (
+        SELECT id, '' FROM Directories WHERE id = 1
+        UNION ALL
+        SELECT d.id, p.path || '/' || d.name FROM Directories d JOIN DirectoryPaths p ON d.parent_id = p.id
+    )
+"""
+
+# Directory ids never change once created, so both directions are cached for the life of the process.
+_ids = {"/": ROOT_DIRECTORY_ID}
+_paths = {ROOT_DIRECTORY_ID: "/"}
+_lock = threading.Lock()
+
+
+def _normalise(dir_path):
+    return os.path.normpath(os.path.abspath(dir_path))
+
+
+def get_directory_id(cursor, dir_path, create=False):
+    """Returns the id of a directory path, creating missing rows when `create` is set (else None if unknown)."""
+    dir_path = _normalise(dir_path)
+    with _lock:
+        if dir_path in _ids:
+            return _ids[dir_path]
+
+    # ✅ Start from the deepest ancestor that is already cached
+    parts = [p for p in dir_path.split("/") if p]
+    depth = len(parts)
+    while depth and "/" + "/".join(parts[:depth]) not in _ids:
+        depth -= 1
+    dir_id = _ids["/" + "/".join(parts[:depth])] if depth else ROOT_DIRECTORY_ID
+
+    for i in range(depth, len(parts)):
+        cursor.execute("SELECT id FROM Directories WHERE parent_id = ? AND name = ?", (dir_id, parts[i]))
+        row = cursor.fetchone()
+        if row is None:
+            if not create:
+                return None
+            cursor.execute("INSERT OR IGNORE INTO Directories (parent_id, name) VALUES (?, ?)", (dir_id, parts[i]))
+            cursor.execute("SELECT id FROM Directories WHERE parent_id = ? AND name = ?", (dir_id, parts[i]))
+            row = cursor.fetchone()
+        dir_id = row[0]
+        path = "/" + "/".join(parts[:i + 1])
+        with _lock:
+            _ids[path] = dir_id
+            _paths[dir_id] = path
+    return dir_id
+
+
+def get_directory_path(cursor, dir_id):
+    """Returns the absolute path of a directory id."""
+    with _lock:
+        if dir_id in _paths:
+            return _paths[dir_id]
+
+    names = []
+    current = dir_id
+    while current not in _paths:
+        cursor.execute("SELECT parent_id, name FROM Directories WHERE id = ?", (current,))
+        row = cursor.fetchone()
+        if row is None:
+            raise KeyError(f"Unknown directory id {dir_id}")
+        current, name = row
+        names.append(name)
+
+    path = _paths[current]
+    for name in reversed(names):
+        path = path.rstrip("/") + "/" + name
+    with _lock:
+        _paths[dir_id] = path
+        _ids[path] = dir_id
+    return path
+
+
+def file_key(cursor, file_path, create=False):
+    """Splits a file path into its (dir_id, file_name) key. dir_id is None if the directory is unknown."""
+    file_path = _normalise(file_path)
+    return get_directory_id(cursor, os.path.dirname(file_path), create), os.path.basename(file_path)
+
+
+def join_file_path(cursor, dir_id, file_name):
+    """Rebuilds a file's absolute path from its (dir_id, file_name) key."""
+    return os.path.join(get_directory_path(cursor, dir_id), file_name)
+
+
+def subtree_sql(column="dir_id"):
+    """SQL condition matching rows whose directory is the bound directory id or below it."""
+    return f"""{column} IN (
+        WITH RECURSIVE Subtree(id) AS (
+            SELECT ? UNION ALL SELECT d.id FROM Directories d JOIN Subtree s ON d.parent_id = s.id
+        ) SELECT id FROM Subtree
+    )"""
+
@@ -0,0 +1,44 @@
+import logging
+from database.db_connection import get_connection
+
+STATE_COLUMNS = ["path", "parent", "dir_mtime", "check_interval", "next_check", "last_changed"]
+
+
+def get_directory_states(top_folder):
+    """Returns {path: state_dict} for every directory seen in previous scans of a scan target."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(STATE_COLUMNS)} FROM DirectoryState WHERE top_folder = ?", (top_folder,))
+    states = {row[0]: dict(zip(STATE_COLUMNS, row)) for row in cursor.fetchall()}
+    conn.close()
+    return states
+
+
+def save_directory_states(top_folder, states):
+    """Stores directory states in bulk (insert or replace)."""
+    if not states:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(f"""
+        INSERT OR REPLACE INTO DirectoryState (top_folder, {', '.join(STATE_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in STATE_COLUMNS)})
+    """, [(top_folder, *(state[c] for c in STATE_COLUMNS)) for state in states])
+    conn.commit()
+    conn.close()
+    logging.info(f"Saved {len(states)} directory states for '{top_folder}'.")
+
+
+def delete_directory_states(paths):
+    """Removes directories (and everything below them) that no longer exist."""
+    if not paths:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "DELETE FROM DirectoryState WHERE path = ? OR substr(path, 1, ?) = ?",
+        [(path, len(path) + 1, path + "/") for path in paths]
+    )
+    conn.commit()
+    conn.close()
+    logging.info(f"Removed {len(paths)} vanished directories from the scan state.")
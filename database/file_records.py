@@ -1,25 +1,62 @@
 import logging
 from database.db_connection import get_connection
+from database.directories import get_directory_id, get_directory_path, file_key
+from database.streams import replace_streams
 
-def store_scan_results(file_name, file_path, file_size, file_modified, file_type):
+VIDEO_FILE_TYPES = ('.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv')
+
+# Files are identified by (dir_id, file_name); reads that need file_path go through the FileRecordPaths view
+FILE_KEY_SQL = "dir_id = ? AND file_name = ?"
+
+UPSERT_FILE_SQL = '''
+    INSERT INTO FileRecords (dir_id, file_name, file_type, file_size, file_modified, top_folder, last_scanned)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(dir_id, file_name) DO UPDATE SET 
+        file_size = excluded.file_size,
+        file_modified = excluded.file_modified,
+        file_type = excluded.file_type,
+        top_folder = COALESCE(excluded.top_folder, FileRecords.top_folder),
+        last_scanned = CURRENT_TIMESTAMP
+'''
+
+def store_scan_results(file_name, file_path, file_size, file_modified, file_type, top_folder=None):
     """Stores or updates scanned file metadata."""
     conn = get_connection()
     cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO FileRecords (file_name, file_type, file_path, file_size, file_modified, last_scanned)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(file_path) DO UPDATE SET 
-            file_size = excluded.file_size,
-            file_modified = excluded.file_modified,
-            file_type = excluded.file_type,
-            last_scanned = CURRENT_TIMESTAMP
-    ''', (file_name, file_type, file_path, file_size, file_modified))
+    dir_id, file_name = file_key(cursor, file_path, create=True)
+    cursor.execute(UPSERT_FILE_SQL, (dir_id, file_name, file_type, file_size, file_modified, top_folder))
 
     conn.commit()
     conn.close()
     logging.info(f"Updated metadata for file: {file_name} (Type: {file_type})")
 
+def store_scan_batch(directories, top_folder=None, commit_every=5000):
+    """Stores the files of many directories at once.
+
+    `directories` yields (dir_path, files) pairs, where files are (file_name, file_size, file_modified, file_type)
+    tuples. Commits every `commit_every` files so detailed scan workers aren't locked out for long.
+    Returns the number of files stored.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    stored = 0
+    pending = 0
+    for dir_path, files in directories:
+        dir_id = get_directory_id(cursor, dir_path, create=True)
+        cursor.executemany(UPSERT_FILE_SQL, [
+            (dir_id, file_name, file_type, file_size, file_modified, top_folder)
+            for file_name, file_size, file_modified, file_type in files
+        ])
+        stored += len(files)
+        pending += len(files)
+        if pending >= commit_every:
+            conn.commit()
+            pending = 0
+    conn.commit()
+    conn.close()
+    logging.info(f"Stored {stored} scanned files.")
+    return stored
+
 def get_total_file_count():
     """Returns the total number of scanned files."""
     conn = get_connection()
@@ -29,40 +66,198 @@ def get_total_file_count():
     conn.close()
     return total
 
+def get_file_record_columns():
+    """Returns (column_name, declared_type) pairs for FileRecords, including the rebuilt file_path."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(FileRecordPaths)")
+    columns = [(row[1], row[2]) for row in cursor.fetchall()]
+    conn.close()
+    return columns
+
+def iter_file_records(columns, top_folder=None, file_types=None, chunk_size=5000):
+    """Yields lists of FileRecords rows in chunks of `chunk_size` without loading the whole table."""
+    conditions = []
+    params = []
+    if top_folder is not None:
+        conditions.append("top_folder = ?")
+        params.append(top_folder)
+    if file_types:
+        conditions.append(f"file_type IN ({', '.join('?' for _ in file_types)})")
+        params.extend(file_types)
+
+    query = f"SELECT {', '.join(columns)} FROM FileRecordPaths"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def get_videos_missing_title_key(limit=5000):
+    """Returns up to `limit` (id, file_name, dir_path) tuples for video files without a dedupe title key."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT id, file_name, dir_id FROM FileRecords
+        WHERE title_key IS NULL AND file_type IN ({', '.join('?' for _ in VIDEO_FILE_TYPES)})
+        LIMIT ?
+    """, (*VIDEO_FILE_TYPES, limit))
+    rows = [(file_id, file_name, get_directory_path(cursor, dir_id)) for file_id, file_name, dir_id in cursor.fetchall()]
+    conn.close()
+    return rows
+
+def set_title_keys(keys):
+    """Stores dedupe title keys in bulk. `keys` is a list of (title_key, id) pairs."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("UPDATE FileRecords SET title_key = ? WHERE id = ?", keys)
+    conn.commit()
+    conn.close()
+
+def clear_title_keys(patterns):
+    """Clears title keys matching any of the GLOB `patterns`, so they are recomputed. Returns the count."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"UPDATE FileRecords SET title_key = NULL WHERE {' OR '.join('title_key GLOB ?' for _ in patterns)}",
+        patterns
+    )
+    cleared = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return cleared
+
+def iter_duplicate_candidates(columns, top_folder=None, chunk_size=5000):
+    """Yields chunks of rows whose title_key occurs more than once, ordered by (title_key, duration).
+
+    Only the indexed title_key column is scanned to find candidates, so unique titles are never loaded.
+    """
+    folder_filter = "AND top_folder = ?" if top_folder is not None else ""
+    params = (top_folder, top_folder) if top_folder is not None else ()
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {', '.join(columns)} FROM FileRecordPaths
+            WHERE title_key IN (
+                SELECT title_key FROM FileRecords
+                WHERE title_key IS NOT NULL AND title_key != '' {folder_filter}
+                GROUP BY title_key HAVING COUNT(*) > 1
+            ) {folder_filter}
+            ORDER BY title_key, duration
+        """, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
 # Video Scan
-def update_video_metadata(file_path, metadata):
-    """Updates the FileRecords table with detailed metadata from ffprobe."""
+METADATA_FIELDS = [
+    "video_codec", "resolution", "duration", "frame_rate", "video_bitrate",
+    "video_bit_depth", "color_primaries", "color_transfer",
+    "audio_codec", "audio_channels", "audio_sample_rate", "audio_bitrate", "audio_languages",
+    "subtitle_count", "subtitle_languages", "file_format", "probe_score",
+]
+
+def _store_streams(cursor, key, streams):
+    """Replaces the Streams rows of the file with `key`, if the metadata carried a stream list."""
+    if streams is None:
+        return
+    cursor.execute(f"SELECT id FROM FileRecords WHERE {FILE_KEY_SQL}", key)
+    row = cursor.fetchone()
+    if row is not None:
+        replace_streams(cursor, row[0], streams)
+
+def update_video_metadata(file_path, metadata, source="ffprobe"):
+    """Updates the FileRecords table with detailed metadata from ffprobe, and its Streams rows in the same transaction."""
     conn = get_connection()
     cursor = conn.cursor()
+    key = file_key(cursor, file_path)
 
-    cursor.execute("""
+    cursor.execute(f"""
         UPDATE FileRecords
-        SET video_codec = ?, resolution = ?, duration = ?, frame_rate = ?, video_bitrate = ?,
-            video_bit_depth = ?, color_primaries = ?, color_transfer = ?,
-            audio_codec = ?, audio_channels = ?, audio_sample_rate = ?, audio_bitrate = ?, audio_languages = ?,
-            subtitle_count = ?, subtitle_languages = ?, file_format = ?, probe_score = ?
-        WHERE file_path = ?
-    """, (
-        metadata["video_codec"], metadata["resolution"], metadata["duration"], metadata["frame_rate"],
-        metadata["video_bitrate"], metadata["video_bit_depth"], metadata["color_primaries"], metadata["color_transfer"],
-        metadata["audio_codec"], metadata["audio_channels"], metadata["audio_sample_rate"], metadata["audio_bitrate"],
-        metadata["audio_languages"], metadata["subtitle_count"], metadata["subtitle_languages"],
-        metadata["file_format"], metadata["probe_score"], file_path
-    ))
+        SET {', '.join(f'{field} = ?' for field in METADATA_FIELDS)}, metadata_source = ?
+        WHERE {FILE_KEY_SQL}
+    """, (*(metadata[field] for field in METADATA_FIELDS), source, *key))
+    if cursor.rowcount:
+        _store_streams(cursor, key, metadata.get("streams"))
 
     conn.commit()
     conn.close()
 
+def import_video_metadata(entries, source):
+    """Bulk-fills metadata (and streams) for files that haven't had a detailed scan yet and marks them as scanned.
+
+    `entries` is a list of (file_path, file_size, metadata) tuples. Only files whose stored size still
+    equals `file_size` are updated; a replaced file keeps waiting for ffprobe. Returns the number of files updated.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    # ✅ Paths in directories we have never scanned can't match, so they are dropped before the update
+    keyed = [(file_key(cursor, file_path), file_size, metadata) for file_path, file_size, metadata in entries]
+    updated = 0
+    for key, file_size, metadata in keyed:
+        if key[0] is None:
+            continue
+        cursor.execute(f"""
+            UPDATE FileRecords
+            SET {', '.join(f'{field} = ?' for field in METADATA_FIELDS)}, metadata_source = ?, detailed_scan_attempted = 1
+            WHERE {FILE_KEY_SQL} AND file_size = ? AND detailed_scan_attempted = 0
+        """, (*(metadata[field] for field in METADATA_FIELDS), source, *key, file_size))
+        # ✅ Streams are only written for files this import actually filled in
+        if cursor.rowcount:
+            updated += 1
+            _store_streams(cursor, key, metadata.get("streams"))
+    conn.commit()
+    conn.close()
+    return updated
+
+def store_bitrate_efficiency(entries, top_folder=None):
+    """Replaces the bitrate efficiency columns in one transaction.
+
+    `entries` yields (bits_per_pixel, bitrate_percentile, bitrate_outlier, id) tuples. Earlier values are
+    cleared first (within `top_folder` if given) so files that can no longer be scored aren't left flagged.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if top_folder is None:
+        cursor.execute("UPDATE FileRecords SET bits_per_pixel = NULL, bitrate_percentile = NULL, bitrate_outlier = NULL")
+    else:
+        cursor.execute("""
+            UPDATE FileRecords SET bits_per_pixel = NULL, bitrate_percentile = NULL, bitrate_outlier = NULL
+            WHERE top_folder = ?
+        """, (top_folder,))
+    cursor.executemany(
+        "UPDATE FileRecords SET bits_per_pixel = ?, bitrate_percentile = ?, bitrate_outlier = ? WHERE id = ?",
+        entries
+    )
+    conn.commit()
+    conn.close()
+
 def get_unscanned_videos():
     """Fetches video files that need a detailed scan."""
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT file_path FROM FileRecords
-        WHERE file_type IN ('.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv')
+    cursor.execute(f"""
+        SELECT file_path FROM FileRecordPaths
+        WHERE file_type IN ({', '.join('?' for _ in VIDEO_FILE_TYPES)})
         AND detailed_scan_attempted = 0
-    """)
+    """, VIDEO_FILE_TYPES)
     
     files = [row[0] for row in cursor.fetchall()]
     logging.info(f"🔎 Found {len(files)} unscanned video files.")  # ✅ Log how many files are found
@@ -75,7 +270,7 @@ def mark_file_as_scanned(file_path):
     """Marks a file as having undergone a detailed scan."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("UPDATE FileRecords SET detailed_scan_attempted = 1 WHERE file_path = ?", (file_path,))
+    cursor.execute(f"UPDATE FileRecords SET detailed_scan_attempted = 1 WHERE {FILE_KEY_SQL}", file_key(cursor, file_path))
     conn.commit()
     conn.close()
     logging.info(f"Marked file as detailed scan completed: {file_path}")
@@ -84,7 +279,7 @@ def mark_scan_attempted(file_path):
     """Marks a file as having attempted a detailed scan, even if it fails."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("UPDATE FileRecords SET detailed_scan_attempted = 1 WHERE file_path = ?", (file_path,))
+    cursor.execute(f"UPDATE FileRecords SET detailed_scan_attempted = 1 WHERE {FILE_KEY_SQL}", file_key(cursor, file_path))
     conn.commit()
     conn.close()
     logging.info(f"Marked file as attempted detailed scan: {file_path}")
@@ -0,0 +1,163 @@
+import os
+import logging
+from database.db_connection import get_connection, DB_FILE
+
+# Scans that change at least this many rows get a full ANALYZE instead of PRAGMA optimize
+ANALYZE_CHANGE_THRESHOLD = 10000
+
+# Rows sampled per index by ANALYZE, so it stays fast on multi-GB databases
+ANALYSIS_LIMIT = 1000
+
+# Incremental vacuum runs once free pages exceed this fraction of the file...
+VACUUM_FRAGMENTATION = 0.05
+
+# ...and frees at most this many pages per maintenance run, spreading the work across scan passes
+INCREMENTAL_VACUUM_PAGES = 20000
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def _pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def format_size(size):
+    """Formats a byte count for log output, e.g. '1.9 GB'."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def get_database_stats():
+    """Returns file sizes, page counts and fragmentation (free pages / total pages) of the database."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    page_count = _pragma(cursor, "page_count")
+    freelist_count = _pragma(cursor, "freelist_count")
+    stats = {
+        "db_size": _file_size(DB_FILE),
+        "wal_size": _file_size(DB_FILE + "-wal"),
+        "page_size": _pragma(cursor, "page_size"),
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "fragmentation": freelist_count / page_count if page_count else 0.0,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(cursor, "auto_vacuum"), "unknown"),
+        "journal_mode": _pragma(cursor, "journal_mode"),
+    }
+    conn.close()
+    return stats
+
+
+def format_database_stats(stats):
+    """One-line summary of get_database_stats() for run summaries."""
+    return (f"DB {format_size(stats['db_size'])}, WAL {format_size(stats['wal_size'])}, "
+            f"{stats['fragmentation']:.1%} free pages ({stats['freelist_count']}/{stats['page_count']}), "
+            f"journal {stats['journal_mode']}, auto_vacuum {stats['auto_vacuum']}")
+
+
+def analyze_database(full=False):
+    """Refreshes query planner statistics. `full` runs ANALYZE on every index, otherwise PRAGMA optimize
+    only re-analyses tables whose statistics look stale."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    cursor.execute("ANALYZE" if full else "PRAGMA optimize")
+    conn.commit()
+    conn.close()
+    logging.info(f"📈 {'ANALYZE' if full else 'PRAGMA optimize'} finished.")
+
+
+def incremental_vacuum(max_pages=INCREMENTAL_VACUUM_PAGES):
+    """Returns up to `max_pages` free pages to the filesystem. Returns the number of pages freed.
+
+    Only works once the database uses auto_vacuum=INCREMENTAL (see vacuum_database()).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _pragma(cursor, "auto_vacuum") != 2:
+        conn.close()
+        return 0
+    before = _pragma(cursor, "freelist_count")
+    # ✅ The pragma frees one page per step; execute() steps only once, executescript() runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    freed = before - _pragma(cursor, "freelist_count")
+    conn.close()
+    if freed:
+        logging.info(f"🧹 Incremental vacuum freed {freed} pages.")
+    return freed
+
+
+def checkpoint_wal():
+    """Writes the WAL back into the database and truncates it. Returns False if readers kept it busy."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _pragma(cursor, "journal_mode") != "wal":
+        conn.close()
+        return True
+    cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    busy, log_frames, checkpointed = cursor.fetchone()
+    conn.close()
+    if busy:
+        logging.warning(f"WAL checkpoint incomplete: {checkpointed} of {log_frames} frames copied (database busy).")
+        return False
+    return True
+
+
+def vacuum_database():
+    """Rebuilds the database with a full VACUUM, switching it to auto_vacuum=INCREMENTAL on the way.
+
+    Needs free disk space for a second copy of the database and locks it for the duration.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.execute("VACUUM")
+    conn.close()
+    logging.info("🧹 Full VACUUM finished; incremental vacuum is enabled.")
+
+
+def set_journal_mode(mode):
+    """Switches the persistent journal mode ('wal' or 'delete'). Returns the mode SQLite reports afterwards."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    result = _pragma(cursor, f"journal_mode = {mode}")
+    conn.close()
+    logging.info(f"Journal mode is now {result}.")
+    return result
+
+
+def run_maintenance(changed_rows=0):
+    """Runs after scan passes: refreshes statistics, vacuums free pages in steps and checkpoints the WAL.
+
+    A full ANALYZE runs when the pass changed at least ANALYZE_CHANGE_THRESHOLD rows or the database
+    has never been analysed. Returns get_database_stats() after maintenance and logs it as the run summary.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    never_analyzed = cursor.fetchone() is None
+    conn.close()
+
+    analyze_database(full=never_analyzed or changed_rows >= ANALYZE_CHANGE_THRESHOLD)
+
+    stats = get_database_stats()
+    if stats["fragmentation"] > VACUUM_FRAGMENTATION:
+        if stats["auto_vacuum"] == "incremental":
+            incremental_vacuum()
+        else:
+            logging.warning(f"{stats['fragmentation']:.1%} of the database is free pages. "
+                            f"Run 'python3 maintenance.py --vacuum' once to enable incremental vacuum.")
+
+    checkpoint_wal()
+    stats = get_database_stats()
+    logging.info(f"🗄️ Database: {format_database_stats(stats)}")
+    return stats
@@ -74,3 +74,41 @@ def deactivate_scan_target(top_folder):
     conn.commit()
     conn.close()
     logging.info(f"Scan target '{top_folder}' deactivated.")
+
+def get_target_schedule(top_folder):
+    """Returns (rescan_interval, next_scan_due, change_rate) for a scan target; values are None until first scanned."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT rescan_interval, next_scan_due, change_rate FROM ScanTargets WHERE top_folder = ?", (top_folder,))
+    result = cursor.fetchone()
+    conn.close()
+    return result if result else (None, None, None)
+
+def set_target_schedule(top_folder, rescan_interval, next_scan_due, change_rate):
+    """Stores the adaptive rescan interval and change rate for a scan target."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE ScanTargets SET rescan_interval = ?, next_scan_due = ?, change_rate = ? WHERE top_folder = ?",
+        (rescan_interval, next_scan_due, change_rate, top_folder)
+    )
+    conn.commit()
+    conn.close()
+    logging.info(f"Next scan of '{top_folder}' in {rescan_interval / 3600:.1f}h (change rate {change_rate or 0:.2%}/day).")
+
+def get_filter_fingerprint(top_folder):
+    """Returns the fingerprint of the scan filters the target's directory state was recorded with, or None."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT filter_fingerprint FROM ScanTargets WHERE top_folder = ?", (top_folder,))
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def set_filter_fingerprint(top_folder, fingerprint):
+    """Stores the fingerprint of the scan filters used for a target's last walk."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE ScanTargets SET filter_fingerprint = ? WHERE top_folder = ?", (fingerprint, top_folder))
+    conn.commit()
+    conn.close()
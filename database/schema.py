@@ -1,13 +1,156 @@
 import logging
-import time
 import os
-from database.db_connection import get_connection
+from database.db_connection import get_connection, enable_wal_mode, DB_FILE
+from database.directories import get_directory_id, DIRECTORY_PATHS_CTE, ROOT_DIRECTORY_ID
+from database.streams import STREAMS_TABLE_SQL
+
+# Columns added after the original schema. Older databases get them via ALTER TABLE.
+ADDED_COLUMNS = {
+    "ScanTargets": [
+        ("rescan_interval", "REAL"),
+        ("next_scan_due", "REAL"),
+        ("change_rate", "REAL"),
+        ("filter_fingerprint", "TEXT"),
+    ],
+    "FileRecords": [
+        ("title_key", "TEXT"),
+        ("lease_owner", "TEXT"),
+        ("lease_expires", "REAL"),
+        ("metadata_source", "TEXT"),
+        ("analysis_key", "TEXT"),
+        ("analysis_crop", "TEXT"),
+        ("analysis_blockiness", "REAL"),
+        ("analysis_upscale_psnr", "REAL"),
+        ("analysis_luma_low", "REAL"),
+        ("analysis_luma_high", "REAL"),
+        ("analysis_frames", "INTEGER"),
+        ("bits_per_pixel", "REAL"),
+        ("bitrate_percentile", "REAL"),
+        ("bitrate_outlier", "INTEGER"),
+    ],
+}
+
+FILE_RECORDS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS FileRecords (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dir_id INTEGER NOT NULL REFERENCES Directories (id),
+        file_name TEXT NOT NULL,
+        file_type TEXT,
+        file_size INTEGER,
+        file_modified TEXT,
+        last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        top_folder TEXT,
+        video_codec TEXT,
+        resolution TEXT,
+        duration REAL,
+        frame_rate TEXT,
+        video_bitrate INTEGER,
+        video_bit_depth INTEGER,
+        color_primaries TEXT,
+        color_transfer TEXT,
+        audio_codec TEXT,
+        audio_channels INTEGER,
+        audio_sample_rate INTEGER,
+        audio_bitrate INTEGER,
+        audio_languages TEXT,
+        subtitle_count INTEGER,
+        subtitle_languages TEXT,
+        file_format TEXT,
+        probe_score INTEGER,
+        detailed_scan_attempted INTEGER DEFAULT 0,
+        UNIQUE (dir_id, file_name)
+    )
+'''
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_filerecords_title_key ON FileRecords (title_key, duration)",
+    "CREATE INDEX IF NOT EXISTS idx_filerecords_pending ON FileRecords (detailed_scan_attempted, lease_expires)",
+    "CREATE INDEX IF NOT EXISTS idx_filerecords_lease_owner ON FileRecords (lease_owner)",
+    "CREATE INDEX IF NOT EXISTS idx_directorystate_top_folder ON DirectoryState (top_folder)",
+    "CREATE INDEX IF NOT EXISTS idx_streams_type_language ON Streams (stream_type, language)",
+    "CREATE INDEX IF NOT EXISTS idx_streams_type_codec ON Streams (stream_type, codec)",
+]
+
+# Compatibility view: FileRecords with the full file_path rebuilt from Directories, for reads and exports
+VIEWS = [
+    f"""CREATE VIEW IF NOT EXISTS FileRecordPaths AS {DIRECTORY_PATHS_CTE}
+        SELECT f.*, p.path || '/' || f.file_name AS file_path
+        FROM FileRecords f JOIN DirectoryPaths p ON p.id = f.dir_id""",
+]
+
+def _add_missing_columns(cursor, table, columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+            logging.info(f"Added column {table}.{name}")
+
+def migrate_file_paths(cursor, chunk_size=5000):
+    """One-time rebuild of a FileRecords table that still stores file_path: paths move into Directories."""
+    cursor.execute("PRAGMA table_info(FileRecords)")
+    old_columns = [row[1] for row in cursor.fetchall()]
+    if "file_path" not in old_columns:
+        return
+
+    logging.info("Moving FileRecords.file_path into the Directories table...")
+    cursor.execute("DROP VIEW IF EXISTS FileRecordPaths")
+    # ✅ Copy into a new table and rename it afterwards: renaming FileRecords itself would make SQLite
+    # rewrite the Streams foreign key to point at the table that is dropped below
+    cursor.execute(FILE_RECORDS_TABLE_SQL.replace("FileRecords (", "FileRecords_new (", 1))
+    _add_missing_columns(cursor, "FileRecords_new", ADDED_COLUMNS["FileRecords"])
+
+    copy_columns = [c for c in old_columns if c != "file_path"]
+    reader = cursor.connection.cursor()
+    reader.execute(f"SELECT file_path, {', '.join(copy_columns)} FROM FileRecords ORDER BY id")
+    moved = 0
+    while True:
+        rows = reader.fetchmany(chunk_size)
+        if not rows:
+            break
+        entries = [(get_directory_id(cursor, os.path.dirname(row[0]), create=True), *row[1:]) for row in rows]
+        cursor.executemany(f"""
+            INSERT OR IGNORE INTO FileRecords_new (dir_id, {', '.join(copy_columns)})
+            VALUES (?, {', '.join('?' for _ in copy_columns)})
+        """, entries)
+        moved += len(rows)
+
+    cursor.execute("DROP TABLE FileRecords")
+    cursor.execute("ALTER TABLE FileRecords_new RENAME TO FileRecords")
+    logging.info(f"Moved {moved} file paths into the Directories table.")
+
+def repair_streams_reference(cursor):
+    """Rebuilds a Streams table whose foreign key an earlier migration left pointing at FileRecords_old."""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'Streams'")
+    row = cursor.fetchone()
+    if row is None or "FileRecords_old" not in row[0]:
+        return
+
+    cursor.execute(STREAMS_TABLE_SQL.replace("Streams (", "Streams_new (", 1))
+    cursor.execute("INSERT INTO Streams_new SELECT * FROM Streams")
+    cursor.execute("DROP TABLE Streams")
+    cursor.execute("ALTER TABLE Streams_new RENAME TO Streams")
+    logging.info("Repointed the Streams foreign key at FileRecords.")
+
+def migrate_database(cursor):
+    """Adds any missing columns, indexes and views to an existing database."""
+    for table, columns in ADDED_COLUMNS.items():
+        _add_missing_columns(cursor, table, columns)
+
+    migrate_file_paths(cursor)
+    repair_streams_reference(cursor)
+
+    for statement in INDEXES + VIEWS:
+        cursor.execute(statement)
 
 def initialize_database():
     """Ensures database and required tables exist before proceeding."""
     conn = get_connection()
     cursor = conn.cursor()
 
+    # ✅ Only takes effect before the first table exists; older databases are converted by vacuum_database()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS ScanTargets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,33 +161,27 @@ def initialize_database():
     ''')
 
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS FileRecords (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            file_name TEXT NOT NULL,
-            file_type TEXT,
-            file_path TEXT NOT NULL UNIQUE,
-            file_size INTEGER,
-            file_modified TEXT,
-            last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            top_folder TEXT,
-            video_codec TEXT,
-            resolution TEXT,
-            duration REAL,
-            frame_rate TEXT,
-            video_bitrate INTEGER,
-            video_bit_depth INTEGER,
-            color_primaries TEXT,
-            color_transfer TEXT,
-            audio_codec TEXT,
-            audio_channels INTEGER,
-            audio_sample_rate INTEGER,
-            audio_bitrate INTEGER,
-            audio_languages TEXT,
-            subtitle_count INTEGER,
-            subtitle_languages TEXT,
-            file_format TEXT,
-            probe_score INTEGER,
-            detailed_scan_attempted INTEGER DEFAULT 0 
+        CREATE TABLE IF NOT EXISTS Directories (
+            id INTEGER PRIMARY KEY,
+            parent_id INTEGER REFERENCES Directories (id),
+            name TEXT NOT NULL,
+            UNIQUE (parent_id, name)
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO Directories (id, parent_id, name) VALUES (?, NULL, '')", (ROOT_DIRECTORY_ID,))
+
+    cursor.execute(FILE_RECORDS_TABLE_SQL)
+    cursor.execute(STREAMS_TABLE_SQL)
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS DirectoryState (
+            path TEXT PRIMARY KEY,
+            top_folder TEXT NOT NULL,
+            parent TEXT,
+            dir_mtime REAL,
+            check_interval REAL,
+            next_check REAL,
+            last_changed REAL
         )
     ''')
 
@@ -56,6 +193,8 @@ def initialize_database():
         )
     ''')
 
+    migrate_database(cursor)
+
     conn.commit()
     conn.close()
     logging.info("Database initialized successfully.")
@@ -65,27 +204,51 @@ def validate_database():
     conn = get_connection()
     cursor = conn.cursor()
 
-    required_tables = {"ScanTargets", "FileRecords", "Settings"}
+    required_tables = {"ScanTargets", "Directories", "FileRecords", "Streams", "DirectoryState", "Settings", "FileRecordPaths"}
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view');")
     existing_tables = {row[0] for row in cursor.fetchall()}
-    
-    conn.close()
 
     if not required_tables.issubset(existing_tables):
+        conn.close()
         logging.error("Database is missing required tables. Reinitializing...")
         return False
-    
+
+    # ✅ Also check for columns added after the database was created
+    for table, columns in ADDED_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        if not {name for name, _ in columns}.issubset(existing_columns):
+            conn.close()
+            logging.warning(f"Table {table} is missing newer columns. Migrating...")
+            return False
+
+    # ✅ Databases from before the Directories table still store full paths in FileRecords
+    cursor.execute("PRAGMA table_info(FileRecords)")
+    if "file_path" in {row[1] for row in cursor.fetchall()}:
+        conn.close()
+        logging.warning("FileRecords still stores full file paths. Migrating...")
+        return False
+
+    conn.close()
     return True
 
-# ✅ Initialize if necessary
-if not os.path.exists("plex_quality_crawler.db"):
-    logging.info("Database file not found. Initializing database...")
-    initialize_database()
-    time.sleep(1)
-elif not validate_database():
-    logging.warning("Reinitializing database due to missing tables.")
-    initialize_database()
-    time.sleep(1)
-else:
-    logging.info("Database is valid. Skipping initialization.")
+_database_ready = False
+
+def ensure_database():
+    """Creates or migrates the database once per process. Entry points call this before the first query."""
+    global _database_ready
+    if _database_ready:
+        return
+
+    if not os.path.exists(DB_FILE):
+        logging.info("Database file not found. Initializing database...")
+        initialize_database()
+        # ✅ Journal mode is stored in the file, so databases switched back with set_journal_mode() keep their mode
+        enable_wal_mode()
+    elif not validate_database():
+        logging.warning("Reinitializing database due to missing tables.")
+        initialize_database()
+    else:
+        logging.info("Database is valid. Skipping initialization.")
+    _database_ready = True
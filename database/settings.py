@@ -1,3 +1,4 @@
+import json
 import logging
 from database.db_connection import get_connection
 
@@ -21,3 +22,54 @@ def set_selected_smb_server(smb_server):
     conn.commit()
     conn.close()
     logging.info(f"Updated selected SMB server: {smb_server}")
+
+def _get_json_setting(key):
+    """Fetch a JSON-encoded setting, or None if it is missing or unreadable."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM Settings WHERE key = ?", (key,))
+    result = cursor.fetchone()
+    conn.close()
+    if not result:
+        return None
+    try:
+        return json.loads(result[0])
+    except json.JSONDecodeError:
+        logging.error(f"Stored setting '{key}' is not valid JSON. Falling back to defaults.")
+        return None
+
+def _set_json_setting(key, value):
+    """Update or insert a JSON-encoded setting."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO Settings (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (key, json.dumps(value)))
+    conn.commit()
+    conn.close()
+    logging.info(f"Updated setting '{key}': {value}")
+
+def get_scan_filters():
+    """Fetch the stored include/exclude scan filter rules, or None if not configured."""
+    return _get_json_setting("scan_filters")
+
+def set_scan_filters(rules):
+    """Update or insert the include/exclude scan filter rules (stored as JSON)."""
+    _set_json_setting("scan_filters", rules)
+
+def get_scan_schedule():
+    """Fetch the stored scan windows and I/O budget, or None if not configured."""
+    return _get_json_setting("scan_schedule")
+
+def set_scan_schedule(schedule):
+    """Update or insert the scan windows and I/O budget (stored as JSON)."""
+    _set_json_setting("scan_schedule", schedule)
+
+def get_title_key_version():
+    """Fetch the version of the title normalisation the stored title keys were built with, or None."""
+    return _get_json_setting("title_key_version")
+
+def set_title_key_version(version):
+    """Record that stored title keys match normalisation `version`."""
+    _set_json_setting("title_key_version", version)
@@ -0,0 +1,130 @@
+import os
+import logging
+from database.db_connection import get_connection
+from database.directories import file_key, get_directory_path
+
+# One row per stream in the container, keyed by (file_id, stream_index) and clustered by file
+STREAMS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS Streams (
+        file_id INTEGER NOT NULL REFERENCES FileRecords (id),
+        stream_index INTEGER NOT NULL,
+        stream_type TEXT NOT NULL,
+        codec TEXT,
+        profile TEXT,
+        channels INTEGER,
+        language TEXT,
+        bitrate INTEGER,
+        is_default INTEGER DEFAULT 0,
+        is_forced INTEGER DEFAULT 0,
+        PRIMARY KEY (file_id, stream_index)
+    ) WITHOUT ROWID
+'''
+
+STREAM_FIELDS = [
+    "stream_index", "stream_type", "codec", "profile", "channels",
+    "language", "bitrate", "is_default", "is_forced",
+]
+
+# Streams without a language tag are stored as "und", matching the audio_languages/subtitle_languages summaries
+UNKNOWN_LANGUAGE = "und"
+
+
+def replace_streams(cursor, file_id, streams):
+    """Replaces the stored streams of one file inside the caller's transaction. `streams` is a list of dicts."""
+    cursor.execute("DELETE FROM Streams WHERE file_id = ?", (file_id,))
+    cursor.executemany(f"""
+        INSERT OR REPLACE INTO Streams (file_id, {', '.join(STREAM_FIELDS)})
+        VALUES (?, {', '.join('?' for _ in STREAM_FIELDS)})
+    """, [(file_id, *(stream.get(field) for field in STREAM_FIELDS)) for stream in streams])
+
+
+def _sorted_paths(cursor, rows):
+    """Rebuilds and sorts the paths of (dir_id, file_name) rows; only the returned rows pay for path lookups."""
+    dir_paths = {}
+    paths = []
+    for dir_id, file_name in rows:
+        if dir_id not in dir_paths:
+            dir_paths[dir_id] = get_directory_path(cursor, dir_id)
+        paths.append(os.path.join(dir_paths[dir_id], file_name))
+    paths.sort()
+    return paths
+
+
+def get_file_streams(file_path):
+    """Returns the stored streams of a file as a list of dicts, in stream order."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    dir_id, file_name = file_key(cursor, file_path)
+    if dir_id is None:
+        conn.close()
+        return []
+    # ✅ Two primary key lookups: the file's (dir_id, file_name) key, then its clustered stream rows
+    cursor.execute(f"""
+        SELECT {', '.join(STREAM_FIELDS)} FROM Streams
+        WHERE file_id = (SELECT id FROM FileRecords WHERE dir_id = ? AND file_name = ?)
+        ORDER BY stream_index
+    """, (dir_id, file_name))
+    streams = [dict(zip(STREAM_FIELDS, row)) for row in cursor.fetchall()]
+    conn.close()
+    return streams
+
+
+def get_files_with_stream(stream_type, language=None, codec=None, top_folder=None):
+    """Returns paths of files with at least one `stream_type` stream matching `language` and/or `codec`."""
+    conditions = ["stream_type = ?"]
+    params = [stream_type]
+    if language is not None:
+        conditions.append("language = ?")
+        params.append(language.lower())
+    if codec is not None:
+        conditions.append("codec = ?")
+        params.append(codec)
+    folder_filter = "AND top_folder = ?" if top_folder is not None else ""
+    if top_folder is not None:
+        params.append(top_folder)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT dir_id, file_name FROM FileRecords
+        WHERE id IN (SELECT file_id FROM Streams WHERE {' AND '.join(conditions)}) {folder_filter}
+    """, params)
+    files = _sorted_paths(cursor, cursor.fetchall())
+    conn.close()
+    return files
+
+
+def get_files_missing_language(language, stream_type="audio", top_folder=None):
+    """Returns paths of probed video files without any `stream_type` stream in `language` (e.g. no English audio)."""
+    folder_filter = "AND top_folder = ?" if top_folder is not None else ""
+    params = [stream_type, language.lower()]
+    if top_folder is not None:
+        params.append(top_folder)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    # ✅ Only files with a stored video stream count, so unprobed files aren't reported as missing the track
+    cursor.execute(f"""
+        SELECT dir_id, file_name FROM FileRecords
+        WHERE id IN (SELECT file_id FROM Streams WHERE stream_type = 'video')
+        AND id NOT IN (SELECT file_id FROM Streams WHERE stream_type = ? AND language = ?) {folder_filter}
+    """, params)
+    files = _sorted_paths(cursor, cursor.fetchall())
+    conn.close()
+    return files
+
+
+def requeue_files_without_streams():
+    """Queues files probed before the Streams table existed for another detailed scan. Returns the count."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE FileRecords SET detailed_scan_attempted = 0
+        WHERE detailed_scan_attempted = 1 AND file_format IS NOT NULL
+        AND id NOT IN (SELECT file_id FROM Streams)
+    """)
+    requeued = cursor.rowcount
+    conn.commit()
+    conn.close()
+    logging.info(f"♻️ Queued {requeued} files for a detailed scan to fill in their streams.")
+    return requeued
@@ -0,0 +1,147 @@
+import os
+import time
+import socket
+import logging
+import threading
+from database.db_connection import get_connection
+from database.file_records import VIDEO_FILE_TYPES, FILE_KEY_SQL
+from database.directories import get_directory_id, file_key, join_file_path, subtree_sql
+
+# How long a claim stays valid without a heartbeat. Expired claims are picked up by other workers.
+DEFAULT_LEASE_SECONDS = 300
+
+_VIDEO_FILTER = f"file_type IN ({', '.join('?' for _ in VIDEO_FILE_TYPES)})"
+
+
+def _keys_filter(cursor, file_paths):
+    """Returns an SQL condition and params matching the (dir_id, file_name) keys of `file_paths`."""
+    keys = [key for key in (file_key(cursor, path) for path in file_paths) if key[0] is not None]
+    if not keys:
+        return "0", []
+    return (f"(dir_id, file_name) IN (VALUES {', '.join('(?, ?)' for _ in keys)})",
+            [value for key in keys for value in key])
+
+
+def make_worker_id():
+    """Returns an id that is unique per host, process and thread."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def count_pending_videos():
+    """Returns the number of video files still waiting for a detailed scan (claimed or not)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM FileRecords WHERE {_VIDEO_FILTER} AND detailed_scan_attempted = 0", VIDEO_FILE_TYPES)
+    total = cursor.fetchone()[0]
+    conn.close()
+    return total
+
+
+def claim_videos(worker_id, limit=20, lease_seconds=DEFAULT_LEASE_SECONDS, exclude_prefixes=()):
+    """Atomically claims up to `limit` unscanned videos for `worker_id` and returns their paths.
+
+    Files that are unclaimed or whose lease has expired are eligible. BEGIN IMMEDIATE takes
+    the write lock before selecting, so two workers can never claim the same row.
+    Paths under any of `exclude_prefixes` (e.g. unavailable shares) are left in the queue.
+    """
+    now = time.time()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # ✅ Excluded shares are matched as directory subtrees instead of path prefixes
+    excluded = [d for d in (get_directory_id(cursor, p) for p in exclude_prefixes) if d is not None]
+    prefix_filter = "".join(f" AND NOT {subtree_sql()}" for _ in excluded)
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"""
+            SELECT id, dir_id, file_name FROM FileRecords
+            WHERE detailed_scan_attempted = 0 AND {_VIDEO_FILTER}
+            AND (lease_expires IS NULL OR lease_expires < ?){prefix_filter}
+            ORDER BY id
+            LIMIT ?
+        """, (*VIDEO_FILE_TYPES, now, *excluded, limit))
+        rows = cursor.fetchall()
+        cursor.executemany(
+            "UPDATE FileRecords SET lease_owner = ?, lease_expires = ? WHERE id = ?",
+            [(worker_id, now + lease_seconds, file_id) for file_id, _, _ in rows]
+        )
+        conn.commit()
+        file_paths = [join_file_path(cursor, dir_id, file_name) for _, dir_id, file_name in rows]
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if rows:
+        logging.info(f"🔒 Worker {worker_id} claimed {len(rows)} files.")
+    return file_paths
+
+
+def heartbeat(worker_id, file_paths, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Extends the lease on files still held by `worker_id`. Returns the number of leases extended."""
+    if not file_paths:
+        return 0
+    conn = get_connection()
+    cursor = conn.cursor()
+    keys_filter, key_params = _keys_filter(cursor, file_paths)
+    cursor.execute(f"""
+        UPDATE FileRecords SET lease_expires = ?
+        WHERE lease_owner = ? AND {keys_filter}
+    """, (time.time() + lease_seconds, worker_id, *key_params))
+    extended = cursor.rowcount
+    conn.commit()
+    conn.close()
+    if extended < len(file_paths):
+        logging.warning(f"Worker {worker_id} lost {len(file_paths) - extended} leases before heartbeat.")
+    return extended
+
+
+def complete_claim(worker_id, file_path):
+    """Marks a claimed file as scanned and clears its lease."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        UPDATE FileRecords SET detailed_scan_attempted = 1, lease_owner = NULL, lease_expires = NULL
+        WHERE {FILE_KEY_SQL}
+    """, file_key(cursor, file_path))
+    conn.commit()
+    conn.close()
+    logging.info(f"Worker {worker_id} completed detailed scan: {file_path}")
+
+
+def release_claims(worker_id, file_paths=None):
+    """Releases leases held by `worker_id` without marking the files scanned (all of them if no paths given)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if file_paths is None:
+        cursor.execute("UPDATE FileRecords SET lease_owner = NULL, lease_expires = NULL WHERE lease_owner = ?", (worker_id,))
+    else:
+        keys_filter, key_params = _keys_filter(cursor, file_paths)
+        cursor.execute(f"""
+            UPDATE FileRecords SET lease_owner = NULL, lease_expires = NULL
+            WHERE lease_owner = ? AND {keys_filter}
+        """, (worker_id, *key_params))
+    released = cursor.rowcount
+    conn.commit()
+    conn.close()
+    if released:
+        logging.info(f"🔓 Worker {worker_id} released {released} claims.")
+    return released
+
+
+def reclaim_expired_leases():
+    """Clears leases whose owner stopped heartbeating. Returns the number of files returned to the queue."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE FileRecords SET lease_owner = NULL, lease_expires = NULL WHERE lease_expires < ?",
+        (time.time(),)
+    )
+    reclaimed = cursor.rowcount
+    conn.commit()
+    conn.close()
+    if reclaimed:
+        logging.warning(f"♻️ Reclaimed {reclaimed} files from expired leases.")
+    return reclaimed
@@ -0,0 +1,226 @@
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import database
+from quality import resolution_tier, QUALITY_TIER_NAMES
+
+DEDUPE_COLUMNS = [
+    "id", "title_key", "file_name", "file_path", "top_folder", "file_size", "duration",
+    "resolution", "video_codec", "video_bitrate", "video_bit_depth", "audio_codec", "audio_channels",
+]
+_TITLE_KEY = DEDUPE_COLUMNS.index("title_key")
+_DURATION = DEDUPE_COLUMNS.index("duration")
+
+# Release tags that mark the end of the title (matched per token, after lowercasing)
+_RELEASE_TAGS = frozenset({
+    "480p", "576p", "720p", "1080p", "1080i", "2160p", "4k", "uhd",
+    "x264", "x265", "h264", "h265", "hevc", "avc", "av1", "xvid", "divx", "10bit", "8bit",
+    "bluray", "bdrip", "brrip", "remux", "webdl", "webrip", "hdtv", "dvdrip", "hdrip",
+    "hdr", "hdr10", "dolbyvision", "sdr", "dts", "dtshd", "truehd", "atmos", "ac3", "eac3", "aac", "flac",
+    "proper", "repack", "extended", "unrated", "remastered", "imax",
+})
+_HYPHENATED_TAGS = {"web-dl": "webdl", "web-rip": "webrip", "blu-ray": "bluray", "dts-hd": "dtshd"}
+_BRACKETS = re.compile(r"[\[\(\{][^\]\)\}]*[\]\)\}]")
+_TOKEN_SPLIT = re.compile(r"[\W_]+")
+_EPISODE = re.compile(r"s(\d{1,2})e(\d{1,3})")
+# Title tokens that don't name anything on their own ("Episode 1.mkv", "Part 2.mkv", "01.mkv")
+_GENERIC_TOKENS = frozenset({"episode", "ep", "part", "pt", "chapter"})
+# Directories between a show and its episodes, skipped when looking for the show name
+_SEASON_DIR = re.compile(r"(season|series|staffel|s)\s*\d+|specials|extras|(disc|disk|cd)\s*\d+")
+# Keys stored before the show directory was added, recomputed once by refresh_title_keys()
+_GENERIC_KEY_GLOBS = ["s[0-9][0-9]e[0-9]*", "episode *", "ep *", "part *", "pt *", "chapter *"]
+# Normalisation version recorded in Settings; version 2 added the show name to episode-only keys
+TITLE_KEY_VERSION = 2
+
+
+def _is_year(token):
+    return len(token) == 4 and token[:2] in ("19", "20") and token.isdigit()
+
+
+def _title_tokens(stem):
+    """Returns (title tokens, episode key) for a lower-cased name without extension."""
+    if "-" in stem:
+        for tag, joined in _HYPHENATED_TAGS.items():
+            stem = stem.replace(tag, joined)
+    stem = _BRACKETS.sub(" ", stem)
+    tokens = [t for t in _TOKEN_SPLIT.split(stem) if t]
+
+    title_end = len(tokens)
+    last_year = None
+    episode_key = ""
+    # ✅ Index 0 is never treated as a year or tag, so titles like "2012" or "Heat" survive
+    for i, token in enumerate(tokens):
+        episode = _EPISODE.fullmatch(token)
+        if episode:
+            episode_key = f"s{int(episode.group(1)):02d}e{int(episode.group(2)):02d}"
+            title_end = i
+            break
+        if i == 0:
+            continue
+        if token in _RELEASE_TAGS:
+            title_end = i
+            break
+        if _is_year(token):
+            last_year = i
+
+    if last_year is not None:
+        title_end = min(title_end, last_year)
+    return tokens[:title_end], episode_key
+
+
+def _show_name(dir_path):
+    """Returns the normalised name of the show directory above an episode, skipping season/disc folders."""
+    while dir_path and dir_path != os.path.dirname(dir_path):
+        name = os.path.basename(dir_path).lower()
+        if not _SEASON_DIR.fullmatch(name.strip()):
+            return " ".join(_title_tokens(name)[0])
+        dir_path = os.path.dirname(dir_path)
+    return ""
+
+
+def normalise_title(file_name, dir_path=None):
+    """Reduces a file name to a comparable title ("The.Matrix.1999.1080p.BluRay.mkv" -> "the matrix").
+
+    The title ends at the last year or the first release tag, whichever comes first.
+    TV episode markers (S01E02) are kept so different episodes never group together.
+    Names without a title of their own ("S01E01.mkv", "Episode 1.mkv") are prefixed with
+    the show directory from `dir_path`, so episodes of different shows don't match.
+    """
+    stem = file_name.rpartition(".")[0] or file_name
+    title, episode_key = _title_tokens(stem.lower())
+
+    # ✅ Bare numbers ("1917.mkv") are left alone; they are usually titles, not episode numbers
+    generic = not title or (title[0] in _GENERIC_TOKENS and all(t in _GENERIC_TOKENS or t.isdigit() for t in title))
+    if dir_path and generic:
+        title = [t for t in (_show_name(dir_path), *title) if t]
+    return " ".join(title + [episode_key] if episode_key else title)
+
+
+def _quality_sort_key(record):
+    """Best copy first: higher tier, then higher bitrate, then larger file."""
+    tier = record["tier"]
+    tier_rank = QUALITY_TIER_NAMES.index(tier) if tier in QUALITY_TIER_NAMES else len(QUALITY_TIER_NAMES)
+    return (tier_rank, -(record["video_bitrate"] or 0), -(record["file_size"] or 0))
+
+
+def _split_by_duration(rows, duration_tolerance):
+    """Splits one title block into clusters whose neighbouring durations differ by <= tolerance."""
+    known = sorted((r for r in rows if r[_DURATION]), key=lambda r: r[_DURATION])
+    unknown = [r for r in rows if not r[_DURATION]]
+
+    clusters = []
+    for row in known:
+        if clusters and row[_DURATION] - clusters[-1][-1][_DURATION] <= duration_tolerance:
+            clusters[-1].append(row)
+        else:
+            clusters.append([row])
+
+    # ✅ Unprobed files can't be checked against a duration, so they join the title only if it is unambiguous
+    if unknown:
+        if len(clusters) == 1:
+            clusters[0].extend(unknown)
+        else:
+            clusters.append(unknown)
+    return clusters
+
+
+def refresh_title_keys(batch_size=5000):
+    """Computes and stores normalised title keys for video files that don't have one yet.
+
+    Keys are stored in the indexed FileRecords.title_key column, so only newly scanned
+    files are normalised on later runs. Returns the number of keys written.
+    """
+    # ✅ One-time migration: episode-only keys from before the show directory was part of the key are recomputed
+    if (database.get_title_key_version() or 1) < TITLE_KEY_VERSION:
+        cleared = database.clear_title_keys(_GENERIC_KEY_GLOBS)
+        database.set_title_key_version(TITLE_KEY_VERSION)
+        logging.info(f"🔑 Cleared {cleared} episode-only title keys for recomputation.")
+
+    updated = 0
+    while True:
+        rows = database.get_videos_missing_title_key(limit=batch_size)
+        if not rows:
+            break
+        # ✅ Unparseable names get "" instead of NULL so they aren't picked up again
+        database.set_title_keys([
+            (normalise_title(file_name, dir_path), file_id) for file_id, file_name, dir_path in rows
+        ])
+        updated += len(rows)
+
+    if updated:
+        logging.info(f"🔑 Stored title keys for {updated} video files.")
+    return updated
+
+
+def _iter_title_blocks(top_folder, chunk_size):
+    """Streams duplicate candidates and yields (title_key, rows) for each consecutive block."""
+    current_key = None
+    block = []
+    for rows in database.iter_duplicate_candidates(DEDUPE_COLUMNS, top_folder=top_folder, chunk_size=chunk_size):
+        for row in rows:
+            if row[_TITLE_KEY] != current_key:
+                if block:
+                    yield current_key, block
+                current_key = row[_TITLE_KEY]
+                block = []
+            block.append(row)
+    if block:
+        yield current_key, block
+
+
+def find_duplicate_groups(top_folder=None, duration_tolerance=120, chunk_size=5000):
+    """Returns groups of files that look like copies of the same title, best copy first.
+
+    Files are blocked by their indexed title key, so the database only returns titles
+    that occur more than once, and each block is then split by duration.
+    """
+    refresh_title_keys()
+
+    groups = []
+    for title, rows in _iter_title_blocks(top_folder, chunk_size):
+        for cluster in _split_by_duration(rows, duration_tolerance):
+            if len(cluster) < 2:
+                continue
+            records = [dict(zip(DEDUPE_COLUMNS, row)) for row in cluster]
+            for record in records:
+                record["tier"] = resolution_tier(record["resolution"])
+            records.sort(key=_quality_sort_key)
+            groups.append({"title": title, "files": records})
+
+    logging.info(f"🔁 Found {len(groups)} duplicate groups.")
+    return groups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find duplicate or multi-version titles in FileRecords.")
+    parser.add_argument("--top-folder", help="Only look for duplicates inside this scan target")
+    parser.add_argument("--tolerance", type=float, default=120, help="Max duration difference in seconds")
+    parser.add_argument("--json", dest="json_path", help="Write the groups to this JSON file instead of printing")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    groups = find_duplicate_groups(top_folder=args.top_folder, duration_tolerance=args.tolerance)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(groups, f, indent=2, ensure_ascii=False)
+        print(f"Wrote {len(groups)} duplicate groups to {args.json_path}")
+        return 0
+
+    for group in groups:
+        print(f"{group['title']} ({len(group['files'])} copies)")
+        for i, record in enumerate(group["files"]):
+            marker = "KEEP" if i == 0 else "    "
+            print(f"  {marker} [{record['tier'] or '?'}] {record['resolution'] or '-'} "
+                  f"{record['video_codec'] or '-'} {record['video_bitrate'] or 0} bps  {record['file_path']}")
+    print(f"{len(groups)} duplicate groups found.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import sys
+import math
+import shutil
+import logging
+import argparse
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import database
+from quality import parse_resolution
+from mount_monitor import MountMonitor
+from scheduler import load_io_budget, PROBE_READ_BYTES
+
+# Cost controls: a few short segments per file, decoded from the nearest keyframe.
+ANALYSIS_SAMPLES = 4          # segments per file
+SAMPLE_FRAMES = 24            # frames decoded per segment
+SAMPLE_TIMEOUT = 60           # seconds before an ffmpeg sample is killed
+SKIP_EDGES = 0.1              # fraction of the runtime skipped at each end (intros, credits)
+DEFAULT_WORKERS = 2           # ffmpeg processes running at once
+
+# A native picture loses detail when halved and scaled back; an upscale barely changes.
+UPSCALE_PSNR_THRESHOLD = 42.0
+
+
+def is_suspected_upscale(metrics):
+    """True if the halve-and-restore round trip barely changed the picture."""
+    psnr = metrics.get("analysis_upscale_psnr") if metrics else None
+    return psnr is not None and psnr >= UPSCALE_PSNR_THRESHOLD
+
+
+def sample_offsets(duration, samples=ANALYSIS_SAMPLES):
+    """Returns `samples` evenly spaced seek positions (seconds), skipping the start and end of the file."""
+    if not duration or duration <= 0:
+        return [0.0]
+    start = duration * SKIP_EDGES
+    span = duration * (1 - 2 * SKIP_EDGES)
+    return [round(start + span * (i + 0.5) / samples, 3) for i in range(samples)]
+
+
+def build_filtergraph(width, height):
+    """Builds the ffmpeg filtergraph for one sample.
+
+    cropdetect/blockdetect/signalstats run on the full frame. The upscale check compares the centre
+    of the frame (clear of letterbox bars) with a copy halved and scaled back up.
+    """
+    centre_w, centre_h = max(width // 4 * 2, 2), max(height // 4 * 2, 2)
+    small_w, small_h = max(centre_w // 4 * 2, 2), max(centre_h // 4 * 2, 2)
+    return (
+        "cropdetect=round=2:reset=0,blockdetect,signalstats,"
+        f"crop={centre_w}:{centre_h},split[orig][copy];"
+        f"[copy]scale={small_w}:{small_h}:flags=area,scale={centre_w}:{centre_h}:flags=bicubic[roundtrip];"
+        "[orig][roundtrip]psnr,metadata=mode=print:file=-"
+    )
+
+
+def parse_frame_metadata(output):
+    """Parses `metadata=print` output into one {key: value} dict per frame."""
+    frames = []
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("frame:"):
+            frames.append({})
+        elif frames and line.startswith("lavfi.") and "=" in line:
+            key, _, value = line.partition("=")
+            frames[-1][key[len("lavfi."):]] = value
+    return frames
+
+
+def _values(frames, key):
+    values = []
+    for frame in frames:
+        try:
+            value = float(frame[key])
+        except (KeyError, ValueError):
+            continue
+        if math.isfinite(value):
+            values.append(value)
+    return values
+
+
+def summarise_frames(samples):
+    """Reduces per-sample frame metadata to the stored summary metrics."""
+    frames = [frame for sample in samples for frame in sample]
+    if not frames:
+        return None
+
+    # ✅ cropdetect accumulates per sample; the widest box across samples avoids dark scenes over-cropping
+    crops = [(int(sample[-1]["cropdetect.w"]), int(sample[-1]["cropdetect.h"]))
+             for sample in samples if sample and "cropdetect.w" in sample[-1]]
+    blockiness = _values(frames, "block")
+    psnr = _values(frames, "psnr.psnr_avg")
+    luma_low = _values(frames, "signalstats.YLOW")
+    luma_high = _values(frames, "signalstats.YHIGH")
+
+    return {
+        "analysis_crop": f"{max(w for w, _ in crops)}x{max(h for _, h in crops)}" if crops else None,
+        "analysis_blockiness": round(statistics.fmean(blockiness), 3) if blockiness else None,
+        "analysis_upscale_psnr": round(statistics.median(psnr), 2) if psnr else None,
+        "analysis_luma_low": statistics.median(luma_low) if luma_low else None,
+        "analysis_luma_high": statistics.median(luma_high) if luma_high else None,
+        "analysis_frames": len(frames),
+    }
+
+
+def analyse_sample(file_path, offset, filtergraph, frames=SAMPLE_FRAMES):
+    """Decodes `frames` frames from the keyframe nearest `offset` and returns their filter metadata."""
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-v", "error",
+        "-noaccurate_seek", "-ss", str(offset), "-i", file_path,
+        "-map", "0:v:0", "-an", "-sn", "-dn", "-frames:v", str(frames),
+        "-vf", filtergraph, "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=SAMPLE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        logging.warning(f"⚠️ Deep analysis sample at {offset}s timed out for {file_path}")
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"❌ ffmpeg failed at {offset}s for {file_path}: {result.stderr.strip()}")
+        return None
+    return parse_frame_metadata(result.stdout)
+
+
+def analyse_file(file_path, resolution, duration, video_bitrate=None, samples=ANALYSIS_SAMPLES,
+                 frames=SAMPLE_FRAMES, io_budget=None):
+    """Runs the sampled analysis for one file. Returns the summary metrics, or None if nothing decoded."""
+    width, height = parse_resolution(resolution)
+    if width is None:
+        return None
+    filtergraph = build_filtergraph(width, height)
+
+    # Rough read cost of one segment: a couple of seconds of video plus the seek to the keyframe
+    sample_bytes = int(video_bitrate / 8 * 4) if video_bitrate else PROBE_READ_BYTES
+
+    results = []
+    for offset in sample_offsets(duration, samples):
+        if io_budget:
+            io_budget.wait_until_allowed()
+            with io_budget.probe(file_path, nbytes=sample_bytes):
+                sample = analyse_sample(file_path, offset, filtergraph, frames)
+        else:
+            sample = analyse_sample(file_path, offset, filtergraph, frames)
+        if sample:
+            results.append(sample)
+    return summarise_frames(results)
+
+
+def run_deep_analysis(workers=DEFAULT_WORKERS, samples=ANALYSIS_SAMPLES, frames=SAMPLE_FRAMES,
+                      top_folder=None, limit=None, batch_size=100, io_budget=None):
+    """Analyses probed videos whose cached analysis is missing or stale. Returns the number analysed.
+
+    At most `workers` ffmpeg processes run at once. Results are cached per file identity
+    (size + mtime), so re-running only picks up new or changed files.
+    """
+    if shutil.which("ffmpeg") is None:
+        logging.error("❌ ffmpeg not found on PATH. Deep analysis needs a local ffmpeg with cropdetect/blockdetect/signalstats.")
+        return 0
+
+    monitor = MountMonitor()
+    analysed = 0
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while limit is None or analysed < limit:
+            batch = database.get_files_needing_analysis(
+                after_id=last_id,
+                limit=batch_size if limit is None else min(batch_size, limit - analysed),
+                top_folder=top_folder,
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            # ✅ Files on a missing share are left for the next run instead of being cached as failures
+            batch = [row for row in batch if monitor.is_available(row[1])]
+            futures = [
+                (file_id, identity, file_path, pool.submit(
+                    analyse_file, file_path, resolution, duration, video_bitrate, samples, frames, io_budget))
+                for file_id, file_path, resolution, duration, video_bitrate, identity in batch
+            ]
+
+            results = []
+            for file_id, identity, file_path, future in futures:
+                metrics = future.result()
+                # ✅ A share that dropped mid-analysis isn't the file's fault: leave it for the next run
+                if metrics is None and not monitor.is_available(file_path, force=True):
+                    continue
+                if metrics is None:
+                    logging.warning(f"⚠️ Deep analysis produced no frames for {file_path}")
+                elif is_suspected_upscale(metrics):
+                    logging.info(f"🔍 Suspected upscale ({metrics['analysis_upscale_psnr']} dB): {file_path}")
+                results.append((file_id, identity, metrics))
+            database.store_analysis_results(results)
+            analysed += len(results)
+            logging.info(f"🔬 Deep analysis: {analysed} files analysed so far.")
+
+    return analysed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sampled decode-based quality analysis (crop, blockiness, upscale detection).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ffmpeg processes to run at once")
+    parser.add_argument("--samples", type=int, default=ANALYSIS_SAMPLES, help="Segments decoded per file")
+    parser.add_argument("--frames", type=int, default=SAMPLE_FRAMES, help="Frames decoded per segment")
+    parser.add_argument("--top-folder", help="Only analyse files from this scan target")
+    parser.add_argument("--limit", type=int, help="Stop after this many files")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    analysed = run_deep_analysis(
+        workers=args.workers, samples=args.samples, frames=args.frames,
+        top_folder=args.top_folder, limit=args.limit, io_budget=load_io_budget(),
+    )
+    print(f"Analysed {analysed} files.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
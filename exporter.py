@@ -0,0 +1,140 @@
+import os
+import csv
+import sys
+import json
+import logging
+import argparse
+import database
+from quality import resolution_tier, QUALITY_TIER_NAMES
+
+# ✅ pyarrow is optional, only needed for Parquet exports
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def _iter_filtered_chunks(columns, top_folder, tier, video_only, chunk_size):
+    """Streams FileRecords chunks, dropping rows outside the requested quality tier."""
+    file_types = database.VIDEO_FILE_TYPES if video_only else None
+    resolution_index = columns.index("resolution")
+
+    for rows in database.iter_file_records(columns, top_folder=top_folder, file_types=file_types, chunk_size=chunk_size):
+        if tier is not None:
+            rows = [row for row in rows if resolution_tier(row[resolution_index]) == tier]
+        if rows:
+            yield rows
+
+
+def _write_csv(output_path, columns, chunks):
+    written = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+    return written
+
+
+def _write_jsonl(output_path, columns, chunks):
+    written = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for rows in chunks:
+            f.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+            written += len(rows)
+    return written
+
+
+def _parquet_schema(column_types):
+    """Maps SQLite declared column types onto a fixed Arrow schema."""
+    fields = []
+    for name, declared in column_types:
+        declared = declared.upper()
+        if "INT" in declared:
+            arrow_type = pa.int64()
+        elif "REAL" in declared:
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _write_parquet(output_path, column_types, chunks):
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow. Install it with 'pip install pyarrow'.")
+
+    schema = _parquet_schema(column_types)
+    written = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for rows in chunks:
+            # ✅ Each chunk becomes one record batch, so memory stays bounded by chunk_size
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    return written
+
+
+def export_file_records(output_path, fmt=None, top_folder=None, tier=None, video_only=False, chunk_size=5000):
+    """Streams FileRecords to CSV, JSON Lines or Parquet and returns the number of rows written.
+
+    The format is taken from the file extension when `fmt` is not given.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+    if tier is not None and tier not in QUALITY_TIER_NAMES:
+        raise ValueError(f"Unknown quality tier '{tier}'. Choose one of: {', '.join(QUALITY_TIER_NAMES)}")
+
+    column_types = database.get_file_record_columns()
+    columns = [name for name, _ in column_types]
+    chunks = _iter_filtered_chunks(columns, top_folder, tier, video_only, chunk_size)
+
+    logging.info(f"📤 Exporting FileRecords to {output_path} ({fmt}, top_folder={top_folder}, tier={tier})")
+
+    if fmt == "csv":
+        written = _write_csv(output_path, columns, chunks)
+    elif fmt == "jsonl":
+        written = _write_jsonl(output_path, columns, chunks)
+    else:
+        written = _write_parquet(output_path, column_types, chunks)
+
+    logging.info(f"✅ Exported {written} rows to {output_path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export FileRecords to CSV, JSON Lines or Parquet.")
+    parser.add_argument("output", help="Output file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Override the format implied by the file extension")
+    parser.add_argument("--top-folder", help="Only export files from this scan target")
+    parser.add_argument("--tier", choices=QUALITY_TIER_NAMES, help="Only export files in this quality tier")
+    parser.add_argument("--video-only", action="store_true", help="Only export video files")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per chunk")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    try:
+        written = export_file_records(
+            args.output, fmt=args.format, top_folder=args.top_folder, tier=args.tier,
+            video_only=args.video_only, chunk_size=args.chunk_size
+        )
+    except (ValueError, RuntimeError) as e:
+        logging.error(f"Export failed: {e}")
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Exported {written} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import sys
+import argparse
+import database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report database size and fragmentation, and run maintenance.")
+    parser.add_argument("--stats", action="store_true", help="Only print the database report")
+    parser.add_argument("--analyze", action="store_true", help="Run a full ANALYZE instead of PRAGMA optimize")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Full VACUUM (needs free space for a copy of the database); enables incremental vacuum")
+    parser.add_argument("--journal-mode", choices=["wal", "delete"],
+                        help="Switch the journal mode, e.g. 'delete' when hosts share the database over a network filesystem")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    before = database.get_database_stats()
+    print(f"Before: {database.format_database_stats(before)}")
+    if args.stats:
+        return 0
+
+    if args.journal_mode:
+        database.set_journal_mode(args.journal_mode)
+    if args.vacuum:
+        database.vacuum_database()
+    after = database.run_maintenance(changed_rows=database.ANALYZE_CHANGE_THRESHOLD if args.analyze else 0)
+    print(f"After:  {database.format_database_stats(after)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import os
+import re
+import time
+import logging
+import threading
+
+MOUNTINFO_FILE = "/proc/self/mountinfo"
+NETWORK_FS_TYPES = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "afpfs", "fuse.sshfs"}
+
+# A stalled SMB/NFS mount can block directory access for minutes; treat it as down after this long
+ACCESS_TIMEOUT = 10
+
+_OCTAL_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape_mount_path(path):
+    """Decodes mountinfo octal escapes ('\\040' -> ' ')."""
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), path)
+
+
+def read_mountinfo(mountinfo_file=MOUNTINFO_FILE):
+    """Returns {mount_point: fs_type} from /proc/self/mountinfo, or {} where it doesn't exist (macOS)."""
+    mounts = {}
+    try:
+        with open(mountinfo_file, encoding="utf-8") as f:
+            for line in f:
+                # Format: id parent major:minor root mount_point options [optional...] - fs_type source super_options
+                pre, _, post = line.partition(" - ")
+                fields = pre.split()
+                if len(fields) < 5 or not post:
+                    continue
+                mounts[_unescape_mount_path(fields[4])] = post.split()[0]
+    except OSError:
+        pass
+    return mounts
+
+
+def share_root(path, mounts=None):
+    """Returns the share a path lives on: '/Volumes/<name>' on macOS, the network mount point on Linux,
+    or the first two path components as a fallback (e.g. '/mnt/media').
+    """
+    path = os.path.abspath(path)
+    parts = path.strip("/").split("/")
+    if parts[0] == "Volumes" and len(parts) > 1:
+        return f"/Volumes/{parts[1]}"
+
+    mounts = read_mountinfo() if mounts is None else mounts
+    network_roots = [m for m, fs in mounts.items() if fs in NETWORK_FS_TYPES and m != "/"]
+    matches = [m for m in network_roots if path == m or path.startswith(m.rstrip("/") + "/")]
+    if matches:
+        return max(matches, key=len)
+
+    # ✅ Never return the path itself, so a file directly under a top-level folder maps to that folder
+    return "/" + "/".join(parts[:min(2, max(len(parts) - 1, 1))])
+
+
+def _list_share(root, timeout):
+    """Lists the share root in a helper thread. Returns True/False for non-empty/empty, or None if it failed or hung."""
+    result = []
+
+    def probe():
+        try:
+            with os.scandir(root) as entries:
+                result.append(next(entries, None) is not None)
+        except OSError:
+            result.append(None)
+
+    thread = threading.Thread(target=probe, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        logging.warning(f"⚠️ Share '{root}' did not answer within {timeout}s. Treating it as unavailable.")
+        return None
+    return result[0]
+
+
+def is_share_available(root, mounts=None, timeout=ACCESS_TIMEOUT):
+    """Checks whether a share is mounted and actually answers.
+
+    The share root is always listed (with a timeout), since a stalled network mount stays mounted.
+    Mounted shares may be empty; anything else must be a non-empty directory, because an
+    unmounted mount point is empty or missing.
+    """
+    if root.startswith("/Volumes/"):
+        return os.path.ismount(root) and _list_share(root, timeout) is not None
+
+    mounts = read_mountinfo() if mounts is None else mounts
+    if mounts.get(root) in NETWORK_FS_TYPES:
+        return _list_share(root, timeout) is not None
+    return _list_share(root, timeout) is True
+
+
+def wait_for_share(root, timeout=60, initial_delay=0.5, max_delay=15):
+    """Polls a share with exponential backoff until it is available or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        if is_share_available(root):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+class MountMonitor:
+    """Tracks share availability for the scanner and its workers.
+
+    A share that goes missing is re-checked lazily with exponential backoff, so callers can
+    skip its files cheaply and carry on with other shares until it comes back.
+    """
+
+    def __init__(self, initial_delay=1, max_delay=300, recheck_interval=5):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._down = {}  # share root -> (next_check, current_delay)
+        self._up = {}  # share root -> time it last answered
+
+    def is_available(self, path, force=False):
+        """Returns True if the share holding `path` is available.
+
+        Down shares are only re-probed when their backoff expires, and shares that answered within
+        `recheck_interval` seconds aren't touched again. `force` always checks the share, e.g. after
+        a probe failed and it must be decided whether the file or the share is at fault.
+        """
+        return self._check_root(share_root(path), force)
+
+    def _check_root(self, root, force=False):
+        now = time.monotonic()
+        with self._lock:
+            state = self._down.get(root)
+            if state and now < state[0] and not force:
+                return False
+            if not force and now - self._up.get(root, float("-inf")) < self.recheck_interval:
+                return True
+
+        available = is_share_available(root)
+
+        with self._lock:
+            if available:
+                self._up[root] = now
+                if root in self._down:
+                    del self._down[root]
+                    logging.info(f"✅ Share '{root}' is available again. Resuming its work.")
+            else:
+                self._up.pop(root, None)
+                delay = self._down[root][1] * 2 if root in self._down else self.initial_delay
+                delay = min(delay, self.max_delay)
+                if root not in self._down:
+                    logging.warning(f"⚠️ Share '{root}' is unavailable. Pausing its work, next check in {delay}s.")
+                self._down[root] = (now + delay, delay)
+        return available
+
+    def unavailable_shares(self):
+        """Returns the share roots currently considered down."""
+        with self._lock:
+            return list(self._down)
+
+    def wait_for_any(self, timeout):
+        """Blocks until one of the down shares comes back or `timeout` seconds pass. Returns True on recovery."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._down:
+                    return True
+                roots = list(self._down)
+                next_check = min(state[0] for state in self._down.values())
+
+            now = time.monotonic()
+            if now >= deadline:
+                return False
+            if now < next_check:
+                time.sleep(min(next_check, deadline) - now)
+                continue
+            # ✅ Roots are checked as they are; share_root() of a fallback root would return its parent
+            if any(self._check_root(root) for root in roots):
+                return True
@@ -0,0 +1,205 @@
+import sys
+import sqlite3
+import logging
+import argparse
+from urllib.parse import parse_qsl
+import database
+
+# Plex media_streams.stream_type_id values
+PLEX_VIDEO_STREAM = 1
+PLEX_AUDIO_STREAM = 2
+PLEX_SUBTITLE_STREAM = 3
+PLEX_STREAM_TYPES = {PLEX_VIDEO_STREAM: "video", PLEX_AUDIO_STREAM: "audio", PLEX_SUBTITLE_STREAM: "subtitle"}
+
+# Plex stores stream bitrates in kbps; FileRecords uses bits per second like ffprobe
+PLEX_STREAM_BITRATE_FACTOR = 1000
+
+
+def open_plex_database(plex_db_path):
+    """Opens a copy of Plex's com.plexapp.plugins.library.db read-only."""
+    return sqlite3.connect(f"file:{plex_db_path}?mode=ro", uri=True)
+
+
+def map_plex_path(plex_path, path_map):
+    """Translates a path on the Plex host to our mount using the longest matching prefix.
+
+    `path_map` is a list of (plex_prefix, local_prefix) pairs. Unmapped paths are returned unchanged.
+    """
+    for plex_prefix, local_prefix in path_map:
+        if plex_path == plex_prefix or plex_path.startswith(plex_prefix.rstrip("/") + "/"):
+            return local_prefix.rstrip("/") + plex_path[len(plex_prefix.rstrip("/")):]
+    return plex_path
+
+
+def _parse_extra_data(extra_data):
+    """Parses Plex's URL-encoded extra_data ("ma:bitDepth=10&ma:colorTrc=smpte2084") into a dict."""
+    if not extra_data:
+        return {}
+    return {key.split(":")[-1]: value for key, value in parse_qsl(extra_data)}
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _flag(value):
+    """Plex booleans may be stored as 0/1 or as Rails-style 't'/'f' strings."""
+    return int(value in (1, "1", "t", "true", True))
+
+
+def _build_metadata(item, streams):
+    """Maps one Plex media item and the streams of one of its parts onto the FileRecords metadata fields."""
+    _, width, height, duration_ms, container, frames_per_second = item
+    video = [s for s in streams if s[0] == PLEX_VIDEO_STREAM]
+    audio = [s for s in streams if s[0] == PLEX_AUDIO_STREAM]
+    subtitles = [s for s in streams if s[0] == PLEX_SUBTITLE_STREAM]
+
+    # ✅ Same choice as ffprobe: first stream of each type by index
+    video_stream = video[0] if video else None
+    audio_stream = audio[0] if audio else None
+    video_extra = _parse_extra_data(video_stream[6]) if video_stream else {}
+    audio_extra = _parse_extra_data(audio_stream[6]) if audio_stream else {}
+
+    def bitrate(stream):
+        return stream[4] * PLEX_STREAM_BITRATE_FACTOR if stream and stream[4] else None
+
+    # ✅ Sidecar subtitles have no index inside the file, so only embedded streams go to the Streams table
+    stream_rows = [{
+        "stream_index": s[5],
+        "stream_type": PLEX_STREAM_TYPES[s[0]],
+        "codec": s[1],
+        "profile": _parse_extra_data(s[6]).get("profile"),
+        "channels": s[3],
+        "language": (s[2] or "und").lower(),
+        "bitrate": bitrate(s),
+        "is_default": _flag(s[7]),
+        "is_forced": _flag(s[8]),
+    } for s in streams if s[0] in PLEX_STREAM_TYPES and s[5] is not None]
+
+    return {
+        "file_format": container,
+        "duration": duration_ms / 1000 if duration_ms else None,
+        "probe_score": None,
+
+        "video_codec": video_stream[1] if video_stream else None,
+        "resolution": f"{width}x{height}" if width and height else None,
+        "frame_rate": video_extra.get("frameRate") or (str(frames_per_second) if frames_per_second else None),
+        "video_bitrate": bitrate(video_stream),
+        "video_bit_depth": _int_or_none(video_extra.get("bitDepth")),
+        "color_primaries": video_extra.get("colorPrimaries"),
+        "color_transfer": video_extra.get("colorTrc"),
+
+        "audio_codec": audio_stream[1] if audio_stream else None,
+        "audio_channels": audio_stream[3] if audio_stream else None,
+        "audio_sample_rate": _int_or_none(audio_extra.get("samplingRate")),
+        "audio_bitrate": bitrate(audio_stream),
+        "audio_languages": ", ".join(s[2] or "und" for s in audio),
+
+        "subtitle_count": len(subtitles),
+        "subtitle_languages": ", ".join(s[2] or "und" for s in subtitles),
+
+        "streams": stream_rows,
+    }
+
+
+def _load_streams(plex_conn, media_part_ids):
+    """Returns {media_part_id: [stream rows ordered by index]} for a chunk of media parts.
+
+    Streams are keyed by part, not by media item: a multi-part item (CD1/CD2) has one set per file.
+    """
+    streams = {}
+    cursor = plex_conn.execute(f"""
+        SELECT media_part_id, stream_type_id, codec, language, channels, bitrate, "index", extra_data, "default", forced
+        FROM media_streams
+        WHERE media_part_id IN ({', '.join('?' for _ in media_part_ids)})
+        ORDER BY media_part_id, "index"
+    """, media_part_ids)
+    for media_part_id, stream_type_id, codec, language, channels, bitrate, index, extra_data, default, forced in cursor:
+        streams.setdefault(media_part_id, []).append(
+            (stream_type_id, codec, language, channels, bitrate, index, extra_data, default, forced)
+        )
+    return streams
+
+
+def iter_plex_metadata(plex_conn, path_map=(), chunk_size=500):
+    """Yields lists of (local_file_path, file_size, metadata) tuples for every media part in the Plex library."""
+    cursor = plex_conn.execute("""
+        SELECT p.file, p.size, p.id, i.id, i.width, i.height, COALESCE(p.duration, i.duration), i.container, i.frames_per_second
+        FROM media_parts p
+        JOIN media_items i ON i.id = p.media_item_id
+        WHERE p.file IS NOT NULL AND p.file != ''
+        ORDER BY p.id
+    """)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        streams = _load_streams(plex_conn, [row[2] for row in rows])
+        yield [
+            (map_plex_path(row[0], path_map), row[1], _build_metadata(row[3:], streams.get(row[2], [])))
+            for row in rows
+        ]
+
+
+def import_plex_metadata(plex_db_path, path_map=(), chunk_size=500):
+    """Fills FileRecords metadata from a Plex library database for files not yet scanned.
+
+    Matched files are marked as scanned, so ffprobe only runs for files Plex doesn't know.
+    Files whose size differs from Plex's (replaced since the library was copied) are left for ffprobe.
+    Returns (plex_parts_seen, files_updated).
+    """
+    # ✅ Longest prefix first, so nested mappings win over their parents
+    path_map = sorted(path_map, key=lambda pair: len(pair[0]), reverse=True)
+
+    plex_conn = open_plex_database(plex_db_path)
+    seen = 0
+    updated = 0
+    try:
+        for entries in iter_plex_metadata(plex_conn, path_map, chunk_size):
+            seen += len(entries)
+            updated += database.import_video_metadata(entries, source="plex")
+    finally:
+        plex_conn.close()
+
+    logging.info(f"📥 Plex import: {updated} of {seen} Plex media parts matched unscanned files.")
+    return seen, updated
+
+
+def parse_path_map(values):
+    """Parses ["/plex/prefix=/local/prefix", ...] into (plex_prefix, local_prefix) pairs."""
+    pairs = []
+    for value in values:
+        plex_prefix, sep, local_prefix = value.partition("=")
+        if not sep or not plex_prefix or not local_prefix:
+            raise ValueError(f"Invalid path mapping '{value}'. Expected PLEX_PREFIX=LOCAL_PREFIX.")
+        pairs.append((plex_prefix, local_prefix))
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import media metadata from a copy of Plex's library database.")
+    parser.add_argument("plex_db", help="Path to a copy of com.plexapp.plugins.library.db")
+    parser.add_argument("--map", action="append", default=[], metavar="PLEX_PREFIX=LOCAL_PREFIX",
+                        help="Translate Plex host paths to local mount paths (repeatable)")
+    args = parser.parse_args(argv)
+
+    database.configure_logging()
+    database.ensure_database()
+
+    try:
+        path_map = parse_path_map(args.map)
+        seen, updated = import_plex_metadata(args.plex_db, path_map)
+    except (ValueError, sqlite3.Error) as e:
+        logging.error(f"Plex import failed: {e}")
+        print(f"Plex import failed: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Imported metadata for {updated} files ({seen} Plex media parts read).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# Resolution tiers, highest first: (name, min_width, min_height).
+# A file reaches a tier if EITHER dimension qualifies, so scope crops (1920x800)
+# and pillarboxed 4:3 encodes (1440x1080) still land in the right tier.
+QUALITY_TIERS = [
+    ("2160p", 3200, 1600),
+    ("1080p", 1800, 1000),
+    ("720p", 1200, 700),
+    ("sd", 0, 0),
+]
+
+QUALITY_TIER_NAMES = [name for name, _, _ in QUALITY_TIERS]
+
+
+def parse_resolution(resolution):
+    """Parses a "WIDTHxHEIGHT" string into (width, height), or (None, None) if unknown."""
+    if not resolution or "x" not in resolution:
+        return None, None
+    width, _, height = resolution.partition("x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        return None, None
+
+
+def resolution_tier(resolution):
+    """Returns the quality tier name for a "WIDTHxHEIGHT" string, or None if unknown."""
+    width, height = parse_resolution(resolution)
+    if width is None:
+        return None
+    for name, min_width, min_height in QUALITY_TIERS:
+        if width >= min_width or height >= min_height:
+            return name
+    return None
@@ -0,0 +1,88 @@
+import os
+import re
+import json
+import fnmatch
+import hashlib
+import logging
+
+# Default rules applied when no custom filters are stored in Settings.
+# Directory names are NAS/OS housekeeping folders that never contain media.
+DEFAULT_SCAN_FILTERS = {
+    "include_extensions": [],  # Empty = record every extension
+    "exclude_extensions": [],
+    "exclude_patterns": ["._*", ".DS_Store", "Thumbs.db", "desktop.ini"],
+    "exclude_dirs": [
+        "@eaDir", ".@__thumb", "#recycle", "#snapshot", "@Recycle", "@Recently-Snapshot",
+        ".AppleDouble", ".Trashes", ".Spotlight-V100", ".fseventsd", ".TemporaryItems",
+        "$RECYCLE.BIN", "System Volume Information",
+    ],
+}
+
+_GLOB_CHARS = ("*", "?", "[")
+
+
+def _normalise_extension(ext):
+    """Returns a lowercase extension with a leading dot ('MKV' -> '.mkv')."""
+    ext = ext.strip().lower()
+    return ext if ext.startswith(".") else f".{ext}"
+
+
+def _compile_globs(patterns):
+    """Combines glob patterns into a single case-insensitive regex match function."""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), re.IGNORECASE).match
+
+
+class ScanFilter:
+    """Include/exclude rules compiled once and checked per directory and file during the walk."""
+
+    def __init__(self, include_extensions=(), exclude_extensions=(), exclude_patterns=(), exclude_dirs=()):
+        self.include_extensions = frozenset(_normalise_extension(e) for e in include_extensions)
+        self.exclude_extensions = frozenset(_normalise_extension(e) for e in exclude_extensions)
+        self._file_pattern_match = _compile_globs(list(exclude_patterns))
+
+        # ✅ Plain names use a set lookup, only real globs go through the regex
+        self.exclude_dir_names = frozenset(d.lower() for d in exclude_dirs if not any(c in d for c in _GLOB_CHARS))
+        self._dir_pattern_match = _compile_globs([d for d in exclude_dirs if any(c in d for c in _GLOB_CHARS)])
+
+        # ✅ Identifies the rules, so directory state recorded under different rules can be detected
+        rules = [sorted(self.include_extensions), sorted(self.exclude_extensions),
+                 sorted(exclude_patterns), sorted(exclude_dirs)]
+        self.fingerprint = hashlib.sha1(json.dumps(rules).encode()).hexdigest()[:16]
+
+    def allows_dir(self, dir_name):
+        """Returns False if the directory (and its whole subtree) should be skipped."""
+        if dir_name.lower() in self.exclude_dir_names:
+            return False
+        if self._dir_pattern_match and self._dir_pattern_match(dir_name):
+            return False
+        return True
+
+    def allows_file(self, file_name):
+        """Returns False if the file should not be recorded."""
+        ext = os.path.splitext(file_name)[1].lower()
+        if self.include_extensions and ext not in self.include_extensions:
+            return False
+        if ext in self.exclude_extensions:
+            return False
+        if self._file_pattern_match and self._file_pattern_match(file_name):
+            return False
+        return True
+
+
+def compile_scan_filter(rules=None):
+    """Builds a ScanFilter from a rules dict, falling back to DEFAULT_SCAN_FILTERS for missing keys."""
+    merged = dict(DEFAULT_SCAN_FILTERS)
+    if rules:
+        unknown = set(rules) - set(DEFAULT_SCAN_FILTERS)
+        if unknown:
+            logging.warning(f"Ignoring unknown scan filter keys: {sorted(unknown)}")
+        merged.update({k: v for k, v in rules.items() if k in DEFAULT_SCAN_FILTERS})
+
+    return ScanFilter(
+        include_extensions=merged["include_extensions"],
+        exclude_extensions=merged["exclude_extensions"],
+        exclude_patterns=merged["exclude_patterns"],
+        exclude_dirs=merged["exclude_dirs"],
+    )
@@ -5,119 +5,189 @@ import logging
 import json
 import sqlite3 
 import sys
+import argparse
+import threading
+import platform
 import database  
-from PyQt6.QtWidgets import QMessageBox
+from scan_filters import compile_scan_filter
+from mount_monitor import MountMonitor, share_root, is_share_available, wait_for_share
+from scheduler import IOBudget, DirectoryTracker, load_io_budget, is_target_due, reschedule_target
 from PyQt6.QtCore import QThread, pyqtSignal
 
 # Global Variables
 DB_FILE = "plex_quality_crawler.db"  # Define the database file
 detailed_scan_running = False
+mount_monitor = MountMonitor()  # Shared by all workers in this process
+MOUNT_RETRY_WINDOW = 1800  # Seconds to keep retrying shares that went away before giving up
 
-# Configure logging
-logging.basicConfig(
-    filename="plex_quality_crawler.log",
-    level=logging.INFO,  
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-
-def remount_drive(scan_path, smb_server):
-    """Attempts to remount the networked SMB drive if it's unmounted."""
-    volume_name = scan_path.split("/")[2]  # Extracts the volume name
-
-    # ✅ Ensure smb_server does NOT have "smb://" prefix
-    if smb_server.startswith("smb://"):
-        smb_server = smb_server.replace("smb://", "")
-
-    smb_share_path = f"smb://{smb_server}/{volume_name}"
+def remount_drive(scan_path, smb_server, timeout=60):
+    """Attempts to remount the networked SMB drive if it's unmounted, then waits for it with backoff."""
+    root = share_root(scan_path)
+    volume_name = os.path.basename(root)
 
     logging.warning(f"Network drive '{volume_name}' appears to be unmounted. Attempting to reconnect...")
 
     # ✅ Check if already mounted
-    if os.path.exists(f"/Volumes/{volume_name}"):
-        logging.info(f"Drive '{volume_name}' is already mounted at /Volumes/{volume_name}. No remount needed.")
+    if is_share_available(root):
+        logging.info(f"Drive '{volume_name}' is already mounted at {root}. No remount needed.")
         return True
 
     try:
-        # ✅ Use `open smb://` instead of `mount_smbfs`
-        result = subprocess.run(["open", smb_share_path], capture_output=True, text=True)
-        logging.info(f"Executed: open {smb_share_path}")
-
-        # ✅ Give time for remounting
-        time.sleep(5)
-
-        # ✅ Check if the share is now mounted
-        if os.path.ismount(f"/Volumes/{volume_name}"):
-            logging.info(f"SMB share '{smb_share_path}' successfully remounted.")
-            return True
+        if platform.system() == "Darwin":
+            if not smb_server:
+                logging.error(f"No SMB server selected. Cannot remount '{volume_name}'.")
+                return False
+
+            # ✅ Ensure smb_server does NOT have "smb://" prefix
+            if smb_server.startswith("smb://"):
+                smb_server = smb_server.replace("smb://", "")
+            smb_share_path = f"smb://{smb_server}/{volume_name}"
+
+            # ✅ Use `open smb://` instead of `mount_smbfs`
+            subprocess.run(["open", smb_share_path], capture_output=True, text=True)
+            logging.info(f"Executed: open {smb_share_path}")
         else:
-            logging.error(f"Failed to remount SMB share '{smb_share_path}'.")
-            return False
+            # ✅ Linux: relies on an fstab entry for the share (cifs with 'user', or systemd automount)
+            result = subprocess.run(["mount", root], capture_output=True, text=True)
+            logging.info(f"Executed: mount {root} (exit code {result.returncode})")
 
     except Exception as e:
-        logging.error(f"Error while attempting to mount SMB share '{smb_share_path}': {str(e)}")
+        logging.error(f"Error while attempting to mount share '{root}': {str(e)}")
         return False
 
+    # ✅ Poll with backoff instead of a fixed sleep
+    if wait_for_share(root, timeout=timeout):
+        logging.info(f"Share '{root}' successfully remounted.")
+        return True
 
+    logging.error(f"Failed to remount share '{root}' within {timeout}s.")
+    return False
 
-# Scans the SMB directory and collects metadata only for new or modified files.
-def scan_directory(scan_path):
-    """Scans the directory and collects metadata, attempting to remount if necessary."""
-    
-    if not os.path.exists(scan_path):
-        logging.error(f"Scan failed: Directory '{scan_path}' not found.")
-
-        # ✅ Attempt to remount if missing
-        smb_server = database.get_selected_smb_server()  # Fetch the selected SMB server
-        if remount_drive(scan_path, smb_server):
-
-            logging.info(f"Retrying scan after remount: {scan_path}")
-            time.sleep(5)  # ✅ Give time for remounting
-            
-            # ✅ Check if the drive is now available
-            if not os.path.exists(scan_path):  
-                logging.error(f"Directory '{scan_path}' still not found after remount attempt.")
-                return []
-        else:
-            return []  # ✅ Skip scanning if remount fails
 
-    scanned_files = []
-    for root, _, files in os.walk(scan_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_size = os.path.getsize(file_path)
-            file_modified = time.ctime(os.path.getmtime(file_path))
-            file_type = os.path.splitext(file)[1].lower() if os.path.splitext(file)[1] else "unknown"
 
-            logging.info(f"Scanned file: {file}, Path: {file_path}, Size: {file_size}, Modified: {file_modified}, Type: {file_type}")
+# Scans the SMB directory and collects metadata only for new or modified files.
+class ScannedDirectory:
+    """Files found in one directory. The directory path is held once, not repeated in every file entry."""
+    __slots__ = ("path", "files")
 
-            scanned_files.append((file, file_path, file_size, file_modified, file_type))
+    def __init__(self, path):
+        self.path = path
+        self.files = []  # (file_name, file_size, file_modified, file_type)
 
-    logging.info(f"Final scanned files list: {len(scanned_files)} files found.")
-    return scanned_files
 
-# MAIN EXECUTION 
-if __name__ == "__main__":
-    selected_folders = database.get_selected_top_folders()  # Fetch active scan targets
-    logging.info(f"Fetched scan targets: {selected_folders}")
+def scan_directory(scan_path, scan_filter=None, mount_timeout=15, io_budget=None, tracker=None):
+    """Scans the directory and collects metadata, attempting to remount if necessary.
 
-    if not selected_folders:
-        logging.info("No scan targets found. Scan process will not start.")
-        selected_folders = []  # Prevents the scan from running but keeps the UI open
+    Excluded directories are pruned before descending, so their subtrees are never walked.
+    File stats are charged to the share's I/O budget and the walk pauses outside scan windows.
+    With a DirectoryTracker, directories whose mtime hasn't changed since the last scan are not
+    re-listed and cold directories are deferred, so only new or changed files are returned.
+    Returns a list of ScannedDirectory objects, or None if the share is unavailable.
+    """
+    
+    if not os.path.exists(scan_path):
+        logging.error(f"Scan failed: Directory '{scan_path}' not found.")
 
-    for folder in selected_folders:
-        scan_path = f"/Volumes/{folder}/"  # Convert top_folder to full path
-        logging.info(f"Scanning: {folder}")
+        # ✅ Attempt to remount if missing; longer outages are retried by the caller
+        smb_server = database.get_selected_smb_server()  # Fetch the selected SMB server
+        if not remount_drive(scan_path, smb_server, timeout=mount_timeout) or not os.path.exists(scan_path):
+            logging.error(f"Directory '{scan_path}' still not found after remount attempt.")
+            return None
+
+    if scan_filter is None:
+        scan_filter = compile_scan_filter(database.get_scan_filters())
+    if io_budget is None:
+        io_budget = IOBudget()  # ✅ No windows or limits unless the caller passes the configured budget
+    share = share_root(scan_path)
+
+    def tracked_children(path):
+        # ✅ Known subdirectories are re-checked against the filters, so a new exclude rule prunes them too
+        return [(child, path) for child in tracker.children(path) if scan_filter.allows_dir(os.path.basename(child))]
+
+    scanned_dirs = []
+    scanned_files = 0
+    pruned_dirs = 0
+    skipped_files = 0
+    stack = [(os.path.normpath(scan_path), None)]
+    while stack:
+        path, parent = stack.pop()
+
+        if tracker and tracker.is_deferred(path):
+            stack.extend(tracked_children(path))
+            continue
 
-        scanned_files = scan_directory(scan_path)  # Perform scan
+        io_budget.wait_until_allowed()
+        io_budget.throttle(share, ops=1)  # ✅ The directory stat/listing itself
+        try:
+            dir_mtime = os.stat(path).st_mtime
+            if tracker and tracker.is_unchanged(path, dir_mtime):
+                stack.extend(tracked_children(path))
+                continue
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logging.warning(f"Could not read directory {path}: {e}")
+            if tracker:
+                tracker.forget(path)
+            continue
 
-        if scanned_files:
-            for file, file_path, file_size, file_modified, file_type in scanned_files:
-                database.store_scan_results(file, file_path, file_size, file_modified, file_type)
+        subdirs = []
+        scanned = ScannedDirectory(path)
+        for entry in entries:
+            # ✅ Like os.walk, symlinked directories are not followed
+            if entry.is_dir():
+                if entry.is_symlink():
+                    continue
+                if scan_filter.allows_dir(entry.name):
+                    subdirs.append(entry.path)
+                else:
+                    pruned_dirs += 1  # ✅ Pruned here so its subtree is never walked
+                continue
+
+            file = entry.name
+            if not scan_filter.allows_file(file):
+                skipped_files += 1
+                continue
+
+            file_path = entry.path
+            io_budget.throttle(share, ops=1)
+            try:
+                stat = entry.stat()
+            except OSError as e:
+                logging.warning(f"Could not stat {file_path}: {e}")
+                continue
+            file_size = stat.st_size
+            file_modified = time.ctime(stat.st_mtime)
+            # ✅ Only a handful of distinct extensions exist, so every file shares the same string objects
+            file_type = sys.intern(os.path.splitext(file)[1].lower()) if os.path.splitext(file)[1] else "unknown"
 
-        database.update_last_scanned(folder)  # Update last scanned timestamp
-        time.sleep(1)  # Small delay
+            logging.info(f"Scanned file: {file}, Path: {file_path}, Size: {file_size}, Modified: {file_modified}, Type: {file_type}")
 
-    logging.info("Scanning completed. Exiting scanner.")
+            scanned.files.append((file, file_size, file_modified, file_type))
+
+        if scanned.files:
+            scanned_dirs.append(scanned)
+            scanned_files += len(scanned.files)
+        if tracker:
+            tracker.record_listing(path, parent, dir_mtime, subdirs)
+        stack.extend((subdir, path) for subdir in subdirs)
+
+    logging.info(f"Final scanned files list: {scanned_files} files found in {len(scanned_dirs)} directories "
+                 f"({pruned_dirs} directories pruned, {skipped_files} files excluded).")
+    return scanned_dirs
+
+# Matroska statistics tags written by mkvmerge; ffprobe reports no bit_rate for these streams
+BITRATE_TAGS = ("BPS", "BPS-eng")
+
+def stream_bitrate(stream):
+    """Returns a stream's own bit rate from ffprobe's bit_rate or the Matroska BPS tag, or None."""
+    tags = stream.get("tags", {})
+    for value in (stream.get("bit_rate"), *(tags.get(tag) for tag in BITRATE_TAGS)):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
 
 # Video Scan
 def extract_metadata_ffprobe(file_path):
@@ -162,6 +232,19 @@ def extract_metadata_ffprobe(file_path):
     subtitle_streams = [s for s in metadata["streams"] if s["codec_type"] == "subtitle"]
     subtitle_languages = [s.get("tags", {}).get("language", "und") for s in subtitle_streams]
 
+    # ✅ Every stream is kept for the Streams table, not just the first of each type
+    streams = [{
+        "stream_index": s.get("index", i),
+        "stream_type": s.get("codec_type", "unknown"),
+        "codec": s.get("codec_name"),
+        "profile": s.get("profile"),
+        "channels": int(s["channels"]) if "channels" in s else None,
+        "language": s.get("tags", {}).get("language", "und").lower(),
+        "bitrate": stream_bitrate(s),
+        "is_default": int(s.get("disposition", {}).get("default", 0)),
+        "is_forced": int(s.get("disposition", {}).get("forced", 0)),
+    } for i, s in enumerate(metadata["streams"])]
+
     return {
         # General File Info
         "file_format": format_info.get("format_name"),
@@ -172,7 +255,7 @@ def extract_metadata_ffprobe(file_path):
         "video_codec": video_stream.get("codec_name") if video_stream else None,
         "resolution": f"{video_stream.get('width', 'unknown')}x{video_stream.get('height', 'unknown')}" if video_stream else None,
         "frame_rate": video_stream.get("avg_frame_rate") if video_stream else None,
-        "video_bitrate": int(video_stream.get("bit_rate", 0)) if video_stream and "bit_rate" in video_stream else None,
+        "video_bitrate": stream_bitrate(video_stream) if video_stream else None,
         "video_bit_depth": int(video_stream.get("bits_per_raw_sample", 0)) if video_stream and "bits_per_raw_sample" in video_stream else None,
         "color_primaries": video_stream.get("color_primaries") if video_stream else None,
         "color_transfer": video_stream.get("color_transfer") if video_stream else None,
@@ -181,64 +264,247 @@ def extract_metadata_ffprobe(file_path):
         "audio_codec": audio_stream.get("codec_name") if audio_stream else None,
         "audio_channels": int(audio_stream.get("channels", 0)) if audio_stream else None,
         "audio_sample_rate": int(audio_stream.get("sample_rate", 0)) if audio_stream else None,
-        "audio_bitrate": int(audio_stream.get("bit_rate", 0)) if audio_stream and "bit_rate" in audio_stream else None,
+        "audio_bitrate": stream_bitrate(audio_stream) if audio_stream else None,
         "audio_languages": ", ".join(audio_languages),
 
         # Subtitle Stream Metadata
         "subtitle_count": len(subtitle_streams),
         "subtitle_languages": ", ".join(subtitle_languages),
+
+        # Per-stream detail, stored in the Streams table
+        "streams": streams,
     }
 
 
-def run_detailed_scan():
-    """Runs the detailed scan process and marks files as scanned."""
+def run_detailed_scan(progress_callback=None, worker_id=None, batch_size=20, lease_seconds=database.DEFAULT_LEASE_SECONDS,
+                      io_budget=None):
+    """Runs the detailed scan process and marks files as scanned.
+
+    Files are claimed in small batches through the lease-based work queue, so several
+    workers (threads, processes or hosts sharing the database) can split the backlog.
+    Probes only run inside the configured scan windows and within the I/O budget.
+    Returns the number of files processed.
+    """
     global detailed_scan_running
 
-    logging.info("🔍 Detailed scan started.")
+    worker_id = worker_id or database.make_worker_id()
+    logging.info(f"🔍 Detailed scan started (worker {worker_id}).")
 
-    video_files = database.get_unscanned_videos()
-    total_files = len(video_files)
+    database.reclaim_expired_leases()
+    total_files = database.count_pending_videos()
 
     if total_files == 0:
         logging.info("✅ No video files need a detailed scan.")
         detailed_scan_running = False
-        return
+        return 0
 
-    logging.info(f"🔄 Scanning {total_files} files for metadata.")
-
-    for i, file in enumerate(video_files):
-        if file.startswith("._") or file.endswith(".DS_Store"):  # ✅ Skip macOS metadata files
-            logging.info(f"⏭️ Skipping macOS metadata file: {file}")
-            continue
+    logging.info(f"🔄 {total_files} files waiting for metadata.")
 
-        logging.info(f"📂 Processing file: {file}")
-        
-        metadata = extract_metadata_ffprobe(file)
-        database.mark_file_as_scanned(file)  
-        if metadata is None:
-            logging.error(f"❌ Skipping {file} due to failed metadata extraction.")
-            continue  # Move to the next file
+    scan_filter = compile_scan_filter(database.get_scan_filters())
+    io_budget = io_budget or load_io_budget()
+    processed = 0
 
-        # ✅ Store metadata & mark as scanned (only once)
-        database.update_video_metadata(file, metadata)
+    try:
+        while True:
+            # ✅ Wait before claiming, so leases aren't held while paused
+            io_budget.wait_until_allowed()
+            batch = database.claim_videos(
+                worker_id, limit=batch_size, lease_seconds=lease_seconds,
+                exclude_prefixes=mount_monitor.unavailable_shares()
+            )
+            if not batch:
+                # ✅ Remaining work may sit on a share that's down; wait for it instead of quitting
+                if mount_monitor.unavailable_shares() and database.count_pending_videos() > 0:
+                    if mount_monitor.wait_for_any(MOUNT_RETRY_WINDOW):
+                        continue
+                    logging.error(f"Shares still unavailable after {MOUNT_RETRY_WINDOW}s: {mount_monitor.unavailable_shares()}")
+                break
+            last_heartbeat = time.time()
+
+            for i, file in enumerate(batch):
+                # ✅ Window closed or Plex got busy mid-batch: give the rest back and pause
+                if not io_budget.is_allowed():
+                    database.release_claims(worker_id, batch[i:])
+                    break
+
+                # ✅ Keep the rest of the batch leased while slow probes run
+                if time.time() - last_heartbeat > lease_seconds / 3:
+                    database.heartbeat(worker_id, batch[i:], lease_seconds)
+                    last_heartbeat = time.time()
+
+                # ✅ Hand files on a missing share back to the queue and keep going with other shares
+                if not mount_monitor.is_available(file):
+                    database.release_claims(worker_id, [file])
+                    continue
+
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, total_files)
+
+                if not scan_filter.allows_file(os.path.basename(file)):  # ✅ Skip excluded files (e.g. macOS "._" metadata)
+                    logging.info(f"⏭️ Skipping excluded file: {file}")
+                    database.complete_claim(worker_id, file)
+                    continue
+
+                logging.info(f"📂 Processing file: {file}")
+
+                with io_budget.probe(file):
+                    metadata = extract_metadata_ffprobe(file)
+                if metadata is None:
+                    # ✅ A share that dropped mid-probe isn't the file's fault: give it back instead of marking it done
+                    if not mount_monitor.is_available(file, force=True):
+                        database.release_claims(worker_id, [file])
+                        continue
+                    logging.error(f"❌ Skipping {file} due to failed metadata extraction.")
+                    database.complete_claim(worker_id, file)
+                    continue  # Move to the next file
+
+                # ✅ Store metadata & mark as scanned (only once)
+                database.update_video_metadata(file, metadata)
+                database.complete_claim(worker_id, file)
+
+                # ✅ Log progress every 50 files instead of every single file
+                if processed % 50 == 0:
+                    logging.info(f"📊 Progress: {processed}/{total_files} files scanned")
+    finally:
+        # ✅ Hand back anything still claimed (e.g. after an error) so other workers can pick it up
+        database.release_claims(worker_id)
+
+    logging.info(f"✅ Detailed scan completed ({processed} files processed by worker {worker_id}).")
+    detailed_scan_running = False  # ✅ Reset flag after completion
+    return processed
 
-        # ✅ Log progress every 50 files instead of every single file
-        if (i + 1) % 50 == 0:
-            logging.info(f"📊 Progress: {i+1}/{len(video_files)} files scanned")
 
+def run_detailed_workers(workers=1, io_budget=None):
+    """Runs `workers` detailed scan workers in parallel threads and waits for them to finish.
 
-    logging.info("✅ Detailed scan completed.")
-    detailed_scan_running = False  # ✅ Reset flag after completion
+    All workers share one I/O budget, so `max_concurrent_probes` applies to the whole process.
+    Returns the number of files processed by all workers.
+    """
+    io_budget = io_budget or load_io_budget()
+    processed = []
+    threads = [
+        threading.Thread(target=lambda: processed.append(run_detailed_scan(io_budget=io_budget)), daemon=True)
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(processed)
 
 
 class ScanThread(QThread):
     progress_signal = pyqtSignal(int, int)  # Emits progress updates
 
     def run(self):
-        total_files = len(database.get_unscanned_videos())
-        scanned_files = 0
+        processed = run_detailed_scan(progress_callback=self.progress_signal.emit)
+        database.run_maintenance(processed)
+
+
+def scan_target(folder, io_budget=None, full=False, adaptive=False):
+    """Scans one scan target and stores the results.
+
+    Returns the number of files stored, or False if its share is unavailable.
+
+    Only changed directories are listed. With `adaptive` (continuous scanning), targets are only
+    walked when their rescan interval is due and cold directories are deferred; manual scans walk
+    every target. `full` lists everything, and so does the first walk after the scan filters changed.
+    """
+    scan_filter = compile_scan_filter(database.get_scan_filters())
+    # ✅ Directories skipped as unchanged would keep the old rules' files and miss newly allowed subtrees
+    filters_changed = database.get_filter_fingerprint(folder) != scan_filter.fingerprint
+    if adaptive and not full and not filters_changed and not is_target_due(folder):
+        logging.info(f"⏭️ Skipping '{folder}': not due for a rescan yet.")
+        return 0
+
+    scan_path = f"/Volumes/{folder}/"  # Convert top_folder to full path
+    full = full or filters_changed
+    logging.info(f"Scanning: {folder}{' (full)' if full else ''}")
+
+    tracker = DirectoryTracker(folder, full=full, defer=adaptive, filter_fingerprint=scan_filter.fingerprint)
+    scanned_dirs = scan_directory(scan_path, scan_filter=scan_filter, io_budget=io_budget, tracker=tracker)  # Perform scan
+    if scanned_dirs is None:
+        # ✅ Registers the share as down so it is re-checked with backoff
+        if mount_monitor.is_available(scan_path):
+            logging.error(f"Share is mounted but '{scan_path}' does not exist. Not retrying.")
+            return 0
+        return False
+
+    stored = database.store_scan_batch(((d.path, d.files) for d in scanned_dirs), top_folder=folder)
+
+    tracker.save()
+    reschedule_target(folder, tracker)
+    database.update_last_scanned(folder)  # Update last scanned timestamp
+    return stored
+
+
+def run_directory_scan(io_budget=None, full=False, adaptive=False):
+    """Scans every active scan target, retrying targets whose share is temporarily down.
+
+    Returns the number of files stored.
+    """
+    selected_folders = database.get_selected_top_folders()  # Fetch active scan targets
+    logging.info(f"Fetched scan targets: {selected_folders}")
 
-        for file in database.get_unscanned_videos():
-            extract_metadata_ffprobe(file)  # Process the file
-            scanned_files += 1
-            self.progress_signal.emit(scanned_files, total_files)  # Emit progress update
\ No newline at end of file
+    if not selected_folders:
+        logging.info("No scan targets found. Scan process will not start.")
+        return 0
+
+    stored = 0
+
+    def scan(folder):
+        nonlocal stored
+        result = scan_target(folder, io_budget, full, adaptive)
+        if result is False:
+            return False
+        stored += result
+        return True
+
+    deferred = [folder for folder in selected_folders if not scan(folder)]
+
+    # ✅ Retry targets whose share was down, polling with backoff while other targets were scanned
+    deadline = time.monotonic() + MOUNT_RETRY_WINDOW
+    while deferred and time.monotonic() < deadline:
+        if not mount_monitor.wait_for_any(deadline - time.monotonic()):
+            break
+        deferred = [folder for folder in deferred if not scan(folder)]
+
+    if deferred:
+        logging.error(f"Skipped scan targets whose share never came back: {deferred}")
+    return stored
+
+
+# MAIN EXECUTION 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plex Quality Crawler scanner")
+    parser.add_argument("--detailed", action="store_true", help="Run detailed (ffprobe) scan workers instead of the directory scan")
+    parser.add_argument("--workers", type=int, default=1, help="Number of detailed scan workers in this process")
+    parser.add_argument("--continuous", action="store_true", help="Keep scanning (directory + detailed) inside the configured scan windows")
+    parser.add_argument("--interval", type=int, default=3600, help="Seconds between passes in continuous mode")
+    parser.add_argument("--full", action="store_true", help="Walk every target and directory, ignoring rescan intervals and directory mtimes")
+    parser.add_argument("--requeue-streams", action="store_true", help="Queue files probed before per-stream storage for another detailed scan")
+    args = parser.parse_args()
+
+    database.configure_logging()
+    database.ensure_database()
+    io_budget = load_io_budget()
+
+    if args.requeue_streams:
+        database.requeue_files_without_streams()
+
+    if args.detailed:
+        database.run_maintenance(run_detailed_workers(args.workers, io_budget))
+        logging.info("Detailed scan workers finished. Exiting scanner.")
+        sys.exit(0)
+
+    while True:
+        # ✅ Statistics, vacuum and WAL checkpoint after every pass; the database summary is logged here
+        database.run_maintenance(run_directory_scan(io_budget, full=args.full, adaptive=args.continuous))
+        if not args.continuous:
+            break
+        database.run_maintenance(run_detailed_workers(args.workers, io_budget))
+        logging.info(f"Pass finished. Next pass in {args.interval}s.")
+        time.sleep(args.interval)
+
+    logging.info("Scanning completed. Exiting scanner.")
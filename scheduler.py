@@ -0,0 +1,323 @@
+import os
+import time
+import logging
+import datetime
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+import database
+from mount_monitor import share_root
+
+# Defaults used when no schedule is stored in Settings ("scan_schedule").
+DEFAULT_SCAN_SCHEDULE = {
+    "windows": [],                 # e.g. ["01:00-07:00", "22:30-23:59"]; empty = scan at any time
+    "max_concurrent_probes": 2,    # ffprobe processes allowed at once in this process
+    "max_ops_per_second": None,    # file operations (stats + probes) per share
+    "max_mb_per_second": None,     # estimated MB read per share
+    "max_load_average": None,      # pause while the 1-minute load average is above this
+    "plex_sessions_file": None,    # file holding the number of active Plex streams
+    "max_plex_sessions": 0,        # pause while more streams than this are playing
+    "check_interval": 30,          # seconds between checks while paused
+}
+
+# Adaptive rescan intervals (seconds), used by continuous scanning only.
+TARGET_MIN_INTERVAL = 3600
+TARGET_MAX_INTERVAL = 7 * 86400
+DIR_MIN_INTERVAL = 3600
+DIR_MAX_INTERVAL = 30 * 86400
+CHANGE_RATE_SMOOTHING = 0.3  # Weight of the latest scan in the change-rate moving average
+TARGET_CHANGE_FRACTION = 0.01  # Rescan a target once ~1% of its directories are expected to have changed
+DIR_QUIET_FRACTION = 0.5  # A directory quiet for N days is checked again after N/2 days
+
+PROBE_READ_BYTES = 5 * 1024 * 1024  # ffprobe's default probesize; used to estimate bytes read per probe
+_ALLOWED_CACHE_SECONDS = 5
+
+
+def parse_window(window):
+    """Parses "HH:MM-HH:MM" into (start_minute, end_minute) of the day."""
+    start, _, end = window.partition("-")
+    start_h, start_m = (int(x) for x in start.strip().split(":"))
+    end_h, end_m = (int(x) for x in end.strip().split(":"))
+    return start_h * 60 + start_m, end_h * 60 + end_m
+
+
+def in_scan_window(windows, now=None):
+    """Returns True if `now` falls inside any window. Windows may wrap past midnight ("22:00-06:00")."""
+    if not windows:
+        return True
+    now = now or datetime.datetime.now()
+    minute = now.hour * 60 + now.minute
+    for window in windows:
+        start, end = parse_window(window)
+        if start <= end:
+            if start <= minute < end:
+                return True
+        elif minute >= start or minute < end:
+            return True
+    return False
+
+
+def read_plex_sessions(sessions_file):
+    """Reads the number of active Plex streams from a file (a single number, or one line per session)."""
+    try:
+        with open(sessions_file, encoding="utf-8") as f:
+            content = f.read().strip()
+    except OSError:
+        return 0
+    if content.isdigit():
+        return int(content)
+    return len([line for line in content.splitlines() if line.strip()])
+
+
+class TokenBucket:
+    """Thread-safe rate limiter. Callers go into debt and sleep it off, so bursts are smoothed out."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class IOBudget:
+    """Scan windows, load-based pausing and per-share I/O limits shared by scan workers."""
+
+    def __init__(self, schedule=None):
+        self.schedule = dict(DEFAULT_SCAN_SCHEDULE)
+        if schedule:
+            self.schedule.update(schedule)
+
+        max_probes = self.schedule["max_concurrent_probes"]
+        self._probe_slots = threading.BoundedSemaphore(max_probes) if max_probes else None
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._allowed_cache = (0.0, None)
+
+    def _share_buckets(self, share):
+        with self._lock:
+            if share not in self._buckets:
+                ops = self.schedule["max_ops_per_second"]
+                mb = self.schedule["max_mb_per_second"]
+                self._buckets[share] = (
+                    TokenBucket(ops) if ops else None,
+                    TokenBucket(mb * 1024 * 1024) if mb else None,
+                )
+            return self._buckets[share]
+
+    def pause_reason(self):
+        """Returns why scanning should pause right now, or None if it may continue."""
+        if not in_scan_window(self.schedule["windows"]):
+            return f"outside scan windows {self.schedule['windows']}"
+
+        max_load = self.schedule["max_load_average"]
+        if max_load is not None and hasattr(os, "getloadavg"):
+            load = os.getloadavg()[0]
+            if load > max_load:
+                return f"load average {load:.2f} above {max_load}"
+
+        sessions_file = self.schedule["plex_sessions_file"]
+        if sessions_file:
+            sessions = read_plex_sessions(sessions_file)
+            if sessions > self.schedule["max_plex_sessions"]:
+                return f"{sessions} active Plex sessions"
+        return None
+
+    def is_allowed(self):
+        """Cheap check for hot loops; the underlying checks run at most every few seconds."""
+        checked_at, reason = self._allowed_cache
+        now = time.monotonic()
+        if now - checked_at > _ALLOWED_CACHE_SECONDS:
+            reason = self.pause_reason()
+            self._allowed_cache = (now, reason)
+        return reason is None
+
+    def wait_until_allowed(self):
+        """Blocks while outside the scan windows or while the system is busy."""
+        if self.is_allowed():
+            return
+        reason = self._allowed_cache[1]
+        logging.info(f"⏸️ Scanning paused: {reason}")
+        while True:
+            time.sleep(self.schedule["check_interval"])
+            reason = self.pause_reason()
+            self._allowed_cache = (time.monotonic(), reason)
+            if reason is None:
+                logging.info("▶️ Scanning resumed.")
+                return
+
+    def throttle(self, share, ops=1, nbytes=0):
+        """Consumes ops/bytes from a share's budget, sleeping if it is exhausted."""
+        ops_bucket, bytes_bucket = self._share_buckets(share)
+        if ops_bucket and ops:
+            ops_bucket.consume(ops)
+        if bytes_bucket and nbytes:
+            bytes_bucket.consume(nbytes)
+
+    @contextmanager
+    def probe(self, file_path, nbytes=PROBE_READ_BYTES):
+        """Holds one probe slot and charges the file's share for the read."""
+        if self._probe_slots:
+            self._probe_slots.acquire()
+        try:
+            self.throttle(share_root(file_path), ops=1, nbytes=nbytes)
+            yield
+        finally:
+            if self._probe_slots:
+                self._probe_slots.release()
+
+
+def _clamp(value, min_value, max_value):
+    return max(min_value, min(max_value, value))
+
+
+def update_change_rate(change_rate, observed):
+    """Exponential moving average of the fraction of directories that changed per day."""
+    if change_rate is None:
+        return observed
+    return CHANGE_RATE_SMOOTHING * observed + (1 - CHANGE_RATE_SMOOTHING) * change_rate
+
+
+def target_interval(change_rate):
+    """Rescan interval for a target: the time until TARGET_CHANGE_FRACTION of its directories are expected to change."""
+    if not change_rate:
+        return TARGET_MAX_INTERVAL
+    return _clamp(TARGET_CHANGE_FRACTION / change_rate * 86400, TARGET_MIN_INTERVAL, TARGET_MAX_INTERVAL)
+
+
+def directory_interval(last_changed, now):
+    """Check interval for a directory: DIR_QUIET_FRACTION of the time since it last changed."""
+    quiet = now - min(last_changed, now) if last_changed is not None else 0
+    return _clamp(quiet * DIR_QUIET_FRACTION, DIR_MIN_INTERVAL, DIR_MAX_INTERVAL)
+
+
+def is_target_due(top_folder, now=None):
+    """Returns True if a scan target's adaptive interval has elapsed (or it was never scanned)."""
+    _, next_scan_due, _ = database.get_target_schedule(top_folder)
+    return next_scan_due is None or (now or time.time()) >= next_scan_due
+
+
+def reschedule_target(top_folder, tracker, now=None):
+    """Updates a target's change rate from the directories the last walk saw change, and derives its rescan interval.
+
+    The rate is the fraction of checked directories that changed, per day since the previous scan.
+    The first scan of a target only records its directories; every one of them is new.
+    """
+    now = now or time.time()
+    interval, next_scan_due, change_rate = database.get_target_schedule(top_folder)
+    checked = tracker.changed + tracker.unchanged
+    if interval is not None and next_scan_due is not None and checked:
+        # ✅ Back-to-back manual scans are damped by never counting less than the minimum interval
+        elapsed = max(now - (next_scan_due - interval), TARGET_MIN_INTERVAL)
+        change_rate = update_change_rate(change_rate, tracker.changed / checked / (elapsed / 86400))
+    interval = target_interval(change_rate) if change_rate is not None else TARGET_MIN_INTERVAL
+    database.set_target_schedule(top_folder, interval, now + interval, change_rate)
+
+
+class DirectoryTracker:
+    """Remembers directory mtimes between scans of one target so unchanged directories aren't re-listed.
+
+    A directory's mtime only changes when entries are added, removed or renamed directly inside it,
+    so an unchanged directory is never listed again but its known subdirectories are still checked.
+    Directories are checked again after a fraction of the time they have been quiet (up to
+    DIR_MAX_INTERVAL), and with `defer=True` they aren't even stat'ed until then. Manual scans
+    leave `defer` off so nothing is skipped. `full=True` lists everything and refreshes the state.
+    `filter_fingerprint` identifies the scan filters of this walk and is stored with the state.
+    """
+
+    def __init__(self, top_folder, full=False, defer=False, now=None, filter_fingerprint=None):
+        self.top_folder = top_folder
+        self.full = full
+        self.filter_fingerprint = filter_fingerprint
+        self.defer = defer
+        self.now = now or time.time()
+        self.states = database.get_directory_states(top_folder)
+        self._children = defaultdict(list)
+        for path, state in self.states.items():
+            if state["parent"] is not None:
+                self._children[state["parent"]].append(path)
+        self._updates = []
+        self._removed = []
+        self.changed = 0
+        self.unchanged = 0
+        self.deferred = 0
+
+    def children(self, path):
+        """Subdirectories of `path` as of the last listing."""
+        return self._children.get(path, [])
+
+    def is_deferred(self, path):
+        """True if a cold directory isn't due for a check yet."""
+        state = self.states.get(path)
+        if (self.full or not self.defer or state is None
+                or state["next_check"] is None or state["next_check"] <= self.now):
+            return False
+        self.deferred += 1
+        return True
+
+    def is_unchanged(self, path, mtime):
+        """Records a check. Returns True if the directory can be skipped because its mtime didn't change."""
+        state = self.states.get(path)
+        if self.full or state is None or state["dir_mtime"] != mtime:
+            return False
+        self.unchanged += 1
+        # ✅ Older states have no last_changed yet; the directory mtime is the last change we know of
+        last_changed = state["last_changed"] if state["last_changed"] is not None else mtime
+        interval = directory_interval(last_changed, self.now)
+        self._updates.append({
+            **state, "check_interval": interval, "next_check": self.now + interval, "last_changed": last_changed,
+        })
+        return True
+
+    def record_listing(self, path, parent, mtime, subdirs):
+        """Records a directory that was listed, and forgets subdirectories that disappeared from it."""
+        state = self.states.get(path)
+        changed = state is None or state["dir_mtime"] != mtime
+        if changed:
+            self.changed += 1
+        else:
+            self.unchanged += 1
+
+        # ✅ A directory seen for the first time last changed at its mtime, so old archive folders start out cold
+        if state is None:
+            last_changed = mtime
+        elif changed:
+            last_changed = self.now
+        else:
+            last_changed = state["last_changed"] if state["last_changed"] is not None else mtime
+        interval = directory_interval(last_changed, self.now)
+        self._updates.append({
+            "path": path, "parent": parent, "dir_mtime": mtime,
+            "check_interval": interval, "next_check": self.now + interval, "last_changed": last_changed,
+        })
+        current = set(subdirs)
+        self._removed.extend(child for child in self.children(path) if child not in current)
+
+    def forget(self, path):
+        """Drops a directory that could not be read any more."""
+        if path in self.states:
+            self._removed.append(path)
+
+    def save(self):
+        """Writes the updated directory states back to the database."""
+        database.delete_directory_states(self._removed)
+        database.save_directory_states(self.top_folder, self._updates)
+        if self.filter_fingerprint is not None:
+            database.set_filter_fingerprint(self.top_folder, self.filter_fingerprint)
+        logging.info(f"📁 '{self.top_folder}': {self.changed} directories changed, {self.unchanged} unchanged, "
+                     f"{self.deferred} cold directories deferred, {len(self._removed)} removed.")
+
+
+def load_io_budget():
+    """Builds an IOBudget from the schedule stored in Settings."""
+    return IOBudget(database.get_scan_schedule())
@@ -0,0 +1,127 @@
+import sqlite3
+import pytest
+import database
+from database import directories, schema
+import plex_import
+
+# Minimal subset of Plex's com.plexapp.plugins.library.db schema that the importer reads
+PLEX_SCHEMA = """
+    CREATE TABLE media_items (
+        id INTEGER PRIMARY KEY, width INTEGER, height INTEGER, duration INTEGER,
+        container TEXT, frames_per_second REAL
+    );
+    CREATE TABLE media_parts (
+        id INTEGER PRIMARY KEY, media_item_id INTEGER, file TEXT, size INTEGER, duration INTEGER
+    );
+    CREATE TABLE media_streams (
+        id INTEGER PRIMARY KEY, media_part_id INTEGER, stream_type_id INTEGER, codec TEXT, language TEXT,
+        channels INTEGER, bitrate INTEGER, "index" INTEGER, extra_data TEXT, "default" BOOLEAN, forced BOOLEAN
+    );
+"""
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """A fresh crawler database in tmp_path with a few scanned, not yet probed files."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(schema, "_database_ready", False)
+    # ✅ Directory ids are cached per process; every test database starts its own tree
+    monkeypatch.setattr(directories, "_ids", {"/": directories.ROOT_DIRECTORY_ID})
+    monkeypatch.setattr(directories, "_paths", {directories.ROOT_DIRECTORY_ID: "/"})
+    database.ensure_database()
+
+    for file_path, size in [
+        ("/Volumes/Movies/Heat (1995)/Heat.mkv", 8_000_000_000),
+        ("/Volumes/Movies/Upgraded (2020)/Upgraded.mkv", 12_000_000_000),
+        ("/Volumes/Movies/Long (1990)/Long CD1.avi", 700_000_000),
+        ("/Volumes/Movies/Long (1990)/Long CD2.avi", 690_000_000),
+    ]:
+        file_name = file_path.rsplit("/", 1)[1]
+        database.store_scan_results(file_name, file_path, size, "Mon Jan  1 00:00:00 2024",
+                                    "." + file_name.rsplit(".", 1)[1].lower(), top_folder="Movies")
+    return tmp_path
+
+
+@pytest.fixture
+def plex_db(tmp_path):
+    """A small Plex library: one film, one film replaced since the copy, one two-part film and one unknown file."""
+    path = tmp_path / "com.plexapp.plugins.library.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(PLEX_SCHEMA)
+    conn.executemany("INSERT INTO media_items VALUES (?, ?, ?, ?, ?, ?)", [
+        (1, 1920, 800, 10_200_000, "mkv", 23.976),
+        (2, 1280, 720, 6_000_000, "mkv", 23.976),
+        (3, 720, 480, 6_000_000, "avi", 25.0),
+        (4, 1920, 1080, 5_000_000, "mp4", 24.0),
+    ])
+    conn.executemany("INSERT INTO media_parts VALUES (?, ?, ?, ?, ?)", [
+        (10, 1, "/data/movies/Heat (1995)/Heat.mkv", 8_000_000_000, None),
+        (20, 2, "/data/movies/Upgraded (2020)/Upgraded.mkv", 4_000_000_000, None),
+        (30, 3, "/data/movies/Long (1990)/Long CD1.avi", 700_000_000, 3_000_000),
+        (31, 3, "/data/movies/Long (1990)/Long CD2.avi", 690_000_000, 3_000_000),
+        (40, 4, "/data/other/Unknown.mp4", 1_000, None),
+    ])
+    conn.executemany(
+        'INSERT INTO media_streams (media_part_id, stream_type_id, codec, language, channels, bitrate, "index", '
+        'extra_data, "default", forced) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (10, 1, "hevc", None, None, 6000, 0, "ma:bitDepth=10&ma:frameRate=24000%2F1001", "t", "f"),
+            (10, 2, "truehd", "eng", 8, 4000, 1, "ma:samplingRate=48000", "t", "f"),
+            (10, 3, "srt", "fre", None, None, 2, None, "f", "t"),
+            (10, 3, "srt", "eng", None, None, None, None, "f", "f"),  # sidecar: counted, no stream row
+            (20, 1, "h264", None, None, 3000, 0, None, 1, 0),
+            (30, 1, "mpeg4", None, None, 1500, 0, None, 1, 0),
+            (30, 2, "mp3", "eng", 2, 128, 1, None, 1, 0),
+            (31, 1, "h264", None, None, 1400, 0, None, 1, 0),
+            (31, 2, "ac3", "ger", 6, 448, 1, None, 1, 0),
+        ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _record(file_path, *columns):
+    conn = database.get_connection()
+    row = conn.execute(f"SELECT {', '.join(columns)} FROM FileRecordPaths WHERE file_path = ?", (file_path,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_map_plex_path_prefers_longest_prefix():
+    path_map = [("/data", "/Volumes/Data"), ("/data/movies", "/Volumes/Movies")]
+    assert plex_import.map_plex_path("/data/movies/a.mkv", sorted(path_map, key=lambda p: -len(p[0]))) == "/Volumes/Movies/a.mkv"
+    assert plex_import.map_plex_path("/data/moviesx/a.mkv", path_map) == "/Volumes/Data/moviesx/a.mkv"
+    assert plex_import.map_plex_path("/elsewhere/a.mkv", path_map) == "/elsewhere/a.mkv"
+
+
+def test_import_fills_matching_files(library, plex_db):
+    seen, updated = plex_import.import_plex_metadata(plex_db, [("/data/movies", "/Volumes/Movies")])
+    assert (seen, updated) == (5, 3)
+
+    heat = "/Volumes/Movies/Heat (1995)/Heat.mkv"
+    assert _record(heat, "video_codec", "resolution", "frame_rate", "video_bitrate", "video_bit_depth", "duration",
+                   "subtitle_count", "metadata_source", "detailed_scan_attempted") == (
+        "hevc", "1920x800", "24000/1001", 6_000_000, 10, 10_200.0, 2, "plex", 1)
+    streams = database.get_file_streams(heat)
+    assert [(s["stream_index"], s["stream_type"], s["language"], s["is_default"], s["is_forced"]) for s in streams] == [
+        (0, "video", "und", 1, 0), (1, "audio", "eng", 1, 0), (2, "subtitle", "fre", 0, 1)]
+
+
+def test_replaced_file_stays_queued_for_ffprobe(library, plex_db):
+    plex_import.import_plex_metadata(plex_db, [("/data/movies", "/Volumes/Movies")])
+    upgraded = "/Volumes/Movies/Upgraded (2020)/Upgraded.mkv"
+    assert _record(upgraded, "video_codec", "detailed_scan_attempted") == (None, 0)
+    assert database.get_file_streams(upgraded) == []
+
+
+def test_multi_part_items_keep_streams_per_part(library, plex_db):
+    plex_import.import_plex_metadata(plex_db, [("/data/movies", "/Volumes/Movies")])
+    cd1 = "/Volumes/Movies/Long (1990)/Long CD1.avi"
+    cd2 = "/Volumes/Movies/Long (1990)/Long CD2.avi"
+    assert _record(cd1, "video_codec", "audio_codec", "duration") == ("mpeg4", "mp3", 3000.0)
+    assert _record(cd2, "video_codec", "audio_codec", "duration") == ("h264", "ac3", 3000.0)
+    assert [s["codec"] for s in database.get_file_streams(cd2)] == ["h264", "ac3"]
+
+
+def test_scanned_files_are_not_overwritten(library, plex_db):
+    plex_import.import_plex_metadata(plex_db, [("/data/movies", "/Volumes/Movies")])
+    assert plex_import.import_plex_metadata(plex_db, [("/data/movies", "/Volumes/Movies")]) == (5, 0)
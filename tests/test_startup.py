@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `-X importtime` budgets in seconds; both take about 0.1s, the budgets leave room for slow CI disks
+IMPORT_BUDGETS = {"database": 0.5, "ui": 1.5}
+
+
+def import_times(modules, cwd):
+    """Imports `modules` in a fresh interpreter run from `cwd` and returns their cumulative import times in seconds."""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    # ✅ Lines look like "import time:  self [us] | cumulative | package"; top-level modules are unindented
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() in modules and not name.startswith("  ", 1):
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_database_import_has_no_side_effects(tmp_path):
+    times = import_times(["database"], tmp_path)
+    assert os.listdir(tmp_path) == [], "importing database created files in the working directory"
+    assert times["database"] < IMPORT_BUDGETS["database"], f"import database took {times['database']:.2f}s"
+
+
+def test_ui_import_has_no_side_effects(tmp_path):
+    pytest.importorskip("PyQt6.QtWidgets")
+    times = import_times(["database", "ui"], tmp_path)
+    assert os.listdir(tmp_path) == [], "importing ui created files in the working directory"
+    for module, budget in IMPORT_BUDGETS.items():
+        assert times[module] < budget, f"import {module} took {times[module]:.2f}s"
@@ -2,13 +2,12 @@ import sys
 import os
 import platform
 import subprocess
-import threading
 import signal
 import psutil
 import logging
 import database
 import database.settings
-from scanner import run_detailed_scan, ScanThread
+from scanner import ScanThread
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QMessageBox, QFileDialog, QDialog, QListWidget,
@@ -18,13 +17,10 @@ from PyQt6.QtCore import QAbstractTableModel, Qt, QTimer, pyqtSignal, QObject
 
 LOG_FILE = os.path.join(os.getcwd(), "plex_quality_crawler.log")  # Log file path
 detailed_scan_running = False  # Global flag to track scan status
+scan_thread = None  # Keeps a reference so the running QThread isn't garbage collected
 
-# Configure logging
-logging.basicConfig(
-    filename="plex_quality_crawler.log",
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Available SMB servers (dummy list for now, will improve later)
+AVAILABLE_SERVERS = ["smb://MBP-Server.local", "smb://NAS-Server.local", "smb://File-Server.local"]
 
 # Switch Class
 class ToggleSwitch(QCheckBox):
@@ -53,13 +49,15 @@ def update_progress(current, total):
 #Progress Update Classes 
 class ScanProgress(QObject):
     progress_signal = pyqtSignal(int, int)  # Emits (current, total)
-scan_progress = ScanProgress()
-scan_progress.progress_signal.connect(update_progress)  # Connect signal to update function
 
-# Create layouts for better structure
-main_layout = QVBoxLayout()
-switches_layout = QVBoxLayout()  
-buttons_layout = QVBoxLayout()
+# Widgets shared by the callbacks below; created in build_window()
+app = None
+window = None
+smb_dropdown = None
+file_count_label = None
+progress_bar = None
+switches_layout = None
+
 #Which Switches Appear
 def load_top_folders():
     """Fetches unique top folders, clears old switches, and updates the UI."""
@@ -113,7 +111,7 @@ def select_scan_path():
 #Detailed Scan Logic
 def start_detailed_scan():
     """Starts the detailed scan and ensures UI updates properly."""
-    global detailed_scan_running
+    global detailed_scan_running, scan_thread
     if detailed_scan_running:
         QMessageBox.warning(None, "Scan in Progress", "A detailed scan is already running.")
         return
@@ -126,8 +124,6 @@ def start_detailed_scan():
     scan_thread.progress_signal.connect(update_progress)  # Connect progress updates
     scan_thread.finished.connect(lambda: set_detailed_scan_running(False))
     scan_thread.start()  # Start scanning in a thread
-
-    threading.Thread(target=run_detailed_scan, daemon=True).start()
 #Remove Scan Dialog
 def open_remove_scan_dialog():
     """Opens a dialog box to allow users to remove scan targets."""
@@ -269,110 +265,133 @@ def toggle_scan_target(state, folder):
         logging.error(f"Error while toggling scan target '{folder}': {str(e)}")
 
 
-# Create the application
-app = QApplication(sys.argv)
-
-# Create the main window
-window = QWidget()
-window.setWindowTitle("Plex Quality Crawler")
-window.resize(600, 400)
-
-# SMB Server Selection Section
-smb_layout = QHBoxLayout()
-
-# Dropdown (QComboBox)
-smb_dropdown = QComboBox()
-smb_layout.addWidget(smb_dropdown)
-
-# Fetch available SMB servers (dummy list for now, will improve later)
-available_servers = ["smb://MBP-Server.local", "smb://NAS-Server.local", "smb://File-Server.local"]
-smb_dropdown.addItems(available_servers)
-
 # Function to handle SMB server selection change
 def update_selected_smb_server():
     selected_server = smb_dropdown.currentText()
     database.set_selected_smb_server(selected_server)  # ✅ Save to database
     logging.info(f"User selected new SMB server: {selected_server}")
 
-# Connect dropdown selection change to the function
-smb_dropdown.currentIndexChanged.connect(update_selected_smb_server)
+# Load last-selected server from database
+def load_selected_smb_server():
+    last_selected_server = database.settings.get_selected_smb_server()
+    if last_selected_server in AVAILABLE_SERVERS:
+        smb_dropdown.setCurrentText(last_selected_server)
+    else:
+        # ✅ If no server was stored, select the first available option
+        default_server = AVAILABLE_SERVERS[0] if AVAILABLE_SERVERS else None
+        smb_dropdown.setCurrentText(default_server)
+        database.set_selected_smb_server(default_server)
+
+    # Connect dropdown selection change to the function once the stored value is shown
+    smb_dropdown.currentIndexChanged.connect(update_selected_smb_server)
+
+
+def build_window():
+    """Creates the main window and its widgets. Doesn't touch the database."""
+    global window, smb_dropdown, file_count_label, progress_bar, switches_layout
+
+    # Create layouts for better structure
+    main_layout = QVBoxLayout()
+    switches_layout = QVBoxLayout()
+
+    # Create the main window
+    window = QWidget()
+    window.setWindowTitle("Plex Quality Crawler")
+    window.resize(600, 400)
+
+    # SMB Server Selection Section
+    smb_layout = QHBoxLayout()
+
+    # Dropdown (QComboBox)
+    smb_dropdown = QComboBox()
+    smb_dropdown.addItems(AVAILABLE_SERVERS)
+    smb_layout.addWidget(smb_dropdown)
+    main_layout.addLayout(smb_layout)
+
+    # File Count Label
+    file_count_label = QLabel("Total Files: 0")
+    main_layout.addWidget(file_count_label)
+
+    # 📌 Create button layouts
+    buttons_layout = QVBoxLayout()  # Main button layout
+
+    # 1️⃣ Horizontal Layout for "Add Scan Target" and "Remove Scan Target"
+    add_remove_layout = QHBoxLayout()
+
+    # Add Scan Target Button
+    select_path_button = QPushButton("Add Scan Target")
+    select_path_button.clicked.connect(select_scan_path)
+    add_remove_layout.addWidget(select_path_button)
+
+    # Remove Scan Targets Button
+    remove_scan_button = QPushButton("Remove Scan Target")
+    remove_scan_button.clicked.connect(open_remove_scan_dialog)
+    add_remove_layout.addWidget(remove_scan_button)
+
+    # 2️⃣ Add the horizontal layout to the main buttons layout
+    buttons_layout.addLayout(add_remove_layout)
+
+    # 3️⃣ Stack the remaining buttons below
+    # Create a horizontal layout for Start Scan and Detailed Scan buttons
+    scan_buttons_layout = QHBoxLayout()
+
+    # Start Scan Button
+    start_scan_button = QPushButton("Start Scan")
+    start_scan_button.clicked.connect(start_scanner)
+    scan_buttons_layout.addWidget(start_scan_button)
+
+    # Stop Scan Button
+    stop_button = QPushButton("Stop Scan")
+    stop_button.clicked.connect(stop_scan)
+    scan_buttons_layout.addWidget(stop_button)
+
+    # Detailed Scan Button
+    detailed_scan_button = QPushButton("Detailed Scan")
+    detailed_scan_button.clicked.connect(start_detailed_scan)
+    scan_buttons_layout.addWidget(detailed_scan_button)
+    buttons_layout.addLayout(scan_buttons_layout)
+
+    # Progress Bar for Detailed Scan
+    progress_bar = QProgressBar()
+    progress_bar.setValue(0)  # Start at 0%
+    progress_bar.setVisible(False)  # Hide initially
+    main_layout.addWidget(progress_bar)
+    # Open logs button
+    logs_button = QPushButton("Open Logs")
+    logs_button.clicked.connect(open_logs)
+    buttons_layout.addWidget(logs_button)
+
+    # 📌 Combine all layouts
+    main_layout.addLayout(switches_layout)
+    main_layout.addLayout(buttons_layout)
+
+    window.setLayout(main_layout)
+
+
+def load_initial_state():
+    """Opens the database and fills the window. Runs after the window has been painted."""
+    database.ensure_database()
+    load_selected_smb_server()
+    load_top_folders() #Load switches
+    update_file_count() #Load file count
+
+
+def main():
+    global app
+    database.configure_logging(logging.DEBUG)
+
+    # Create the application
+    app = QApplication(sys.argv)
+    build_window()
 
+    # Show the window
+    window.show()
+    # ✅ Queue the database work behind the first paint so the window appears immediately
+    QTimer.singleShot(0, load_initial_state)
 
-# Load last-selected server from database
-last_selected_server = database.settings.get_selected_smb_server()
-if last_selected_server in available_servers:
-    smb_dropdown.setCurrentText(last_selected_server)
-else:
-    # ✅ If no server was stored, select the first available option
-    default_server = available_servers[0] if available_servers else None
-    smb_dropdown.setCurrentText(default_server)
-    database.set_selected_smb_server(default_server) 
-# Combine with existing layout
-main_layout.addLayout(smb_layout)
-
-# File Count Label
-file_count_label = QLabel("Total Files: 0")
-main_layout.addWidget(file_count_label)
-
-# 📌 Create button layouts
-buttons_layout = QVBoxLayout()  # Main button layout
-
-# 1️⃣ Horizontal Layout for "Add Scan Target" and "Remove Scan Target"
-add_remove_layout = QHBoxLayout()
-
-# Add Scan Target Button
-select_path_button = QPushButton("Add Scan Target")
-select_path_button.clicked.connect(select_scan_path)
-add_remove_layout.addWidget(select_path_button)
-
-# Remove Scan Targets Button
-remove_scan_button = QPushButton("Remove Scan Target")
-remove_scan_button.clicked.connect(open_remove_scan_dialog)
-add_remove_layout.addWidget(remove_scan_button)
-
-# 2️⃣ Add the horizontal layout to the main buttons layout
-buttons_layout.addLayout(add_remove_layout)
-
-# 3️⃣ Stack the remaining buttons below
-# Create a horizontal layout for Start Scan and Detailed Scan buttons
-scan_buttons_layout = QHBoxLayout()
-
-# Start Scan Button
-start_scan_button = QPushButton("Start Scan")
-start_scan_button.clicked.connect(start_scanner)
-scan_buttons_layout.addWidget(start_scan_button)
-
-# Stop Scan Button
-stop_button = QPushButton("Stop Scan")
-stop_button.clicked.connect(stop_scan)
-scan_buttons_layout.addWidget(stop_button)
-
-# Detailed Scan Button
-detailed_scan_button = QPushButton("Detailed Scan")
-detailed_scan_button.clicked.connect(start_detailed_scan)
-scan_buttons_layout.addWidget(detailed_scan_button)
-buttons_layout.addLayout(scan_buttons_layout)
-
-# Progress Bar for Detailed Scan
-progress_bar = QProgressBar()
-progress_bar.setValue(0)  # Start at 0%
-progress_bar.setVisible(False)  # Hide initially
-main_layout.addWidget(progress_bar)
-# Open logs button
-logs_button = QPushButton("Open Logs")
-logs_button.clicked.connect(open_logs)
-buttons_layout.addWidget(logs_button)
-
-# 📌 Combine all layouts
-main_layout.addLayout(switches_layout)
-main_layout.addLayout(buttons_layout)
-
-window.setLayout(main_layout)
-
-# Show the window
-load_top_folders() #Load switches
-update_file_count() #Load file count
-window.show()
-
-# Run the application event loop
-sys.exit(app.exec())
+    # Run the application event loop
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())